@@ -3,15 +3,299 @@
 Analyze long runs and generate quality scores (A, B, or C).
 """
 
+from __future__ import annotations
+
+import hashlib
+import io
 import os
-import glob
-import pandas as pd
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from dataclasses import asdict, dataclass
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, AbstractSet, Dict, Iterator, List, NamedTuple, Tuple, Optional
+
+# pandas is the slowest import here and scoring already-extracted channels
+# doesn't need it, so it is imported inside the functions that use it.
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Candidate columns for each field, in order of preference
+HR_COLUMNS = ('heart_rate',)
+CADENCE_COLUMNS = ('cadence', 'running_cadence', 'session_avg_running_cadence')
+SPEED_COLUMNS = ('speed', 'enhanced_speed', 'session_avg_speed')
+CHANNEL_COLUMNS = HR_COLUMNS + CADENCE_COLUMNS + SPEED_COLUMNS
+DISTANCE_COLUMNS = ('session_total_distance', 'total_distance')
+START_TIME_COLUMNS = ('session_start_time', 'timestamp')
+
+# Time columns are kept as the strings written by the FIT export rather than
+# letting Arrow infer timestamp types.
+TIME_COLUMNS = ('timestamp', 'session_start_time')
+
+# Columns the long-run analysis reads; every other FIT-export column is
+# skipped at parse time.
+RUN_COLUMNS = frozenset(CHANNEL_COLUMNS + TIME_COLUMNS + DISTANCE_COLUMNS)
+
+# Columns needed to pick the long runs out of a folder
+HEADER_COLUMNS = frozenset(TIME_COLUMNS + DISTANCE_COLUMNS)
+
+# Channel samples are stored as float32: HR and cadence are small integers and
+# watch speeds carry ~3 significant digits, so float64 only doubles the bytes.
+# (Unsigned int types can't hold the NaN gaps in the telemetry.)
+CHANNEL_DTYPES = {col: 'float32' for col in CHANNEL_COLUMNS}
+
+# A long run's time series never fits in fewer bytes than this
+MIN_RUN_FILE_BYTES = 1024
+
+# Parquet copies of run CSVs, keyed by file path, mtime and size
+PARQUET_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'coros_fit', 'runs')
+
+# Finished analyses are cached here, keyed by file path, mtime and size.
+# Bump ANALYSIS_CACHE_VERSION whenever the scoring changes.
+ANALYSIS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'coros_fit', 'analysis')
+ANALYSIS_CACHE_VERSION = 3
+
+# Grading thresholds: *_OK bounds define a stable channel, *_BAD bounds a
+# degrading one (HR in bpm / %, cadence in spm / %, pace in min/km)
+HR_CV_OK = 8.0
+HR_DRIFT_OK = 8.0
+HR_CV_BAD = 12.0
+HR_DRIFT_BAD = 15.0
+CAD_CV_OK = 5.0
+CAD_DEG_OK = 3.0
+CAD_CV_BAD = 8.0
+CAD_DEG_BAD = -5.0
+PACE_DEG_OK = 0.5
+PACE_DEG_BAD = 1.0
+
+GRADE_EMOJI = {'A': '🟢', 'B': '🟡', 'C': '🔴'}
+
+REPORT_HEADER = (
+    "🏃 LONG RUN QUALITY SCORING ANALYSIS",
+    "=" * 80,
+    "",
+    "Scoring Criteria:",
+    "  A Run: HR stable, Cadence stable, Legs recover in 24-36h",
+    "         ➡️ Progress volume or terrain",
+    "",
+    "  B Run: HR drift but controlled, Minor form loss",
+    "         ➡️ Repeat similar load",
+    "",
+    "  C Run: HR + pace + cadence all degrade",
+    "         ➡️ Reduce load next week",
+    "",
+    "=" * 80,
+    "",
+)
+
+
+def _parquet_path(csv_file: str) -> str:
+    """
+    Get the Parquet copy of a run CSV.
+    
+    The key covers the file's mtime and size, so an edited or re-exported
+    CSV maps to a new copy.
+    
+    Returns:
+        Path of the Parquet file in PARQUET_CACHE_DIR
+    """
+    stat = os.stat(csv_file)
+    key = f"{os.path.abspath(csv_file)}|{stat.st_mtime_ns}|{stat.st_size}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(PARQUET_CACHE_DIR, f"{digest}.parquet")
+
+
+def _parquet_is_current(csv_file: str) -> bool:
+    """Check whether a run CSV has a Parquet copy of its current contents."""
+    try:
+        return os.path.exists(_parquet_path(csv_file))
+    except OSError:
+        return False
+
+
+def _ensure_parquet(csv_file: str) -> Optional[str]:
+    """
+    Get a Parquet copy of a run CSV, converting it on first use.
+    
+    Returns:
+        Path to the Parquet file, or None if pyarrow is missing or conversion failed
+    """
+    if not PARQUET_AVAILABLE:
+        return None
+    
+    try:
+        parquet_file = _parquet_path(csv_file)
+        if not os.path.exists(parquet_file):
+            os.makedirs(PARQUET_CACHE_DIR, exist_ok=True)
+            tmp_file = f"{parquet_file}.{os.getpid()}.tmp"
+            column_types = {col: pa.string() for col in TIME_COLUMNS}
+            column_types.update({col: pa.float32() for col in CHANNEL_COLUMNS})
+            convert_options = pa_csv.ConvertOptions(column_types=column_types)
+            table = pa_csv.read_csv(csv_file, convert_options=convert_options)
+            pq.write_table(table, tmp_file, compression='zstd')
+            os.replace(tmp_file, parquet_file)
+        return parquet_file
+    except Exception:
+        return None
+
+
+def load_run_data(csv_file: str, nrows: Optional[int] = None,
+                  columns: frozenset = RUN_COLUMNS) -> pd.DataFrame:
+    """
+    Read a run CSV, keeping only the columns used by the analysis.
+    
+    Reads go through the Parquet copy of the CSV when pyarrow is available,
+    so only the requested column chunks are decoded. Only whole-file reads
+    create the copy; a partial read of a CSV without one reads the CSV.
+    
+    Args:
+        csv_file: Path to the run CSV
+        nrows: Number of rows to read (None reads the whole file)
+        columns: Column names to keep; names missing from the file are ignored
+        
+    Returns:
+        DataFrame restricted to the requested columns
+    """
+    import pandas as pd
+    
+    if nrows is None:
+        parquet_file = _ensure_parquet(csv_file)
+    else:
+        parquet_file = _parquet_path(csv_file) if PARQUET_AVAILABLE and _parquet_is_current(csv_file) else None
+    if parquet_file is not None:
+        parquet = pq.ParquetFile(parquet_file)
+        present = [col for col in parquet.schema_arrow.names if col in columns]
+        if nrows is None:
+            return parquet.read(columns=present).to_pandas()
+        batch = next(parquet.iter_batches(batch_size=nrows, columns=present), None)
+        return batch.to_pandas() if batch is not None else pd.DataFrame(columns=present)
+    
+    return pd.read_csv(csv_file, nrows=nrows, usecols=lambda col: col in columns, dtype=CHANNEL_DTYPES)
+
+
+def _read_run_header(csv_file: str) -> Optional[Dict]:
+    """
+    Read the distance and start time of a single run file.
+    
+    Returns:
+        Dictionary with run information, or None if the file can't be read
+    """
+    try:
+        df = load_run_data(csv_file, nrows=1, columns=HEADER_COLUMNS)
+        return _run_header(csv_file, df.iloc[0].to_dict())
+    except Exception:
+        return None
+
+
+def _read_parquet_header(csv_file: str) -> Optional[Dict]:
+    """
+    Read the distance and start time of a run from its current Parquet copy.
+    
+    The first row is taken straight from the first record batch, without
+    building a DataFrame.
+    
+    Returns:
+        Dictionary with run information, or None if the copy can't be read
+    """
+    try:
+        parquet = pq.ParquetFile(_parquet_path(csv_file))
+        columns = [col for col in parquet.schema_arrow.names if col in HEADER_COLUMNS]
+        batch = next(parquet.iter_batches(batch_size=1, columns=columns))
+        return _run_header(csv_file, {col: batch.column(col)[0].as_py() for col in columns})
+    except Exception:
+        return None
 
 
-def get_long_runs(running_folder: str, min_distance_km: float = 10.0, top_n: int = 5) -> List[Dict]:
+def _run_header(csv_file: str, first_row: Dict) -> Dict:
+    """
+    Build the run information from the first row of a run file.
+    
+    Args:
+        csv_file: Path to the run CSV
+        first_row: Mapping of header column name to its first-row value
+        
+    Returns:
+        Dictionary with the file path, distance in km, start time and filename
+    """
+    import pandas as pd
+    
+    distance_col = _first_column(first_row.keys(), DISTANCE_COLUMNS)
+    start_time_col = _first_column(first_row.keys(), START_TIME_COLUMNS)
+    
+    # Get distance from session data
+    distance = None
+    if distance_col:
+        distance = first_row[distance_col]
+    
+    # Convert distance from meters to km if needed
+    if distance is not None:
+        if pd.notna(distance):
+            # If distance is > 100, assume it's in meters
+            if distance > 100:
+                distance = distance / 1000.0
+            # If distance is very small (< 0.1 km), it's likely already in km but too short
+            elif distance < 0.1:
+                distance = None  # Skip very short activities
+    
+    # Get timestamp
+    timestamp = None
+    if start_time_col:
+        timestamp = first_row[start_time_col]
+    
+    return {
+        'file': csv_file,
+        'distance_km': distance,
+        'timestamp': timestamp,
+        'filename': os.path.basename(csv_file)
+    }
+
+
+def _scan_run_headers(csv_files: List[str], max_workers: Optional[int] = None) -> List[Optional[Dict]]:
+    """
+    Read the header of every run file, in the order given.
+    
+    Runs with a Parquet copy (made when a run is analyzed) have their header
+    read from the copy's first record batch in this process; the rest are read
+    from the CSV in worker processes, without converting them. Runs that never
+    qualify as long runs therefore never get a copy, and the pool is skipped
+    when every run has one.
+    
+    Returns:
+        Run information per file, None where a file can't be read
+    """
+    if not PARQUET_AVAILABLE:
+        csv_only = csv_files
+    else:
+        csv_only = [csv_file for csv_file in csv_files if not _parquet_is_current(csv_file)]
+    
+    csv_headers = {}
+    if csv_only:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            csv_headers = dict(zip(csv_only, pool.map(_read_run_header, csv_only, chunksize=16)))
+    
+    return [
+        csv_headers[csv_file] if csv_file in csv_headers else _read_parquet_header(csv_file)
+        for csv_file in csv_files
+    ]
+
+
+def get_long_runs(running_folder: str, min_distance_km: float = 10.0, top_n: int = 5,
+                  max_workers: Optional[int] = None) -> List[Dict]:
     """
     Get the most recent long runs from the running folder.
     
@@ -19,82 +303,185 @@ def get_long_runs(running_folder: str, min_distance_km: float = 10.0, top_n: int
         running_folder: Path to running folder
         min_distance_km: Minimum distance to qualify as "long run"
         top_n: Number of runs to return
+        max_workers: Number of workers for the header scan (default: pool default)
         
     Returns:
         List of dictionaries with run information
     """
-    csv_files = glob.glob(os.path.join(running_folder, "*.csv"))
+    import pandas as pd
     
-    runs = []
+    if not os.path.isdir(running_folder):
+        return []
     
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file, nrows=1)
-            
-            # Get distance from session data
-            distance = None
-            if 'session_total_distance' in df.columns:
-                distance = df['session_total_distance'].iloc[0]
-            elif 'total_distance' in df.columns:
-                distance = df['total_distance'].iloc[0]
-            
-            # Convert distance from meters to km if needed
-            if distance is not None:
-                if pd.notna(distance):
-                    # If distance is > 100, assume it's in meters
-                    if distance > 100:
-                        distance = distance / 1000.0
-                    # If distance is very small (< 0.1 km), it's likely already in km but too short
-                    elif distance < 0.1:
-                        distance = None  # Skip very short activities
-            
-            # Get timestamp
-            timestamp = None
-            if 'session_start_time' in df.columns:
-                timestamp = df['session_start_time'].iloc[0]
-            elif 'timestamp' in df.columns:
-                timestamp = df['timestamp'].iloc[0]
-            
-            if distance is not None and distance >= min_distance_km:
-                runs.append({
-                    'file': csv_file,
-                    'distance_km': distance,
-                    'timestamp': timestamp,
-                    'filename': os.path.basename(csv_file)
-                })
-        except Exception as e:
-            continue
+    # Tiny files (empty exports, session-only summaries) are dropped on their
+    # size alone, without opening them
+    with os.scandir(running_folder) as entries:
+        csv_files = [
+            entry.path for entry in entries
+            if entry.name.endswith('.csv') and not entry.name.startswith('.') and entry.is_file() and entry.stat().st_size >= MIN_RUN_FILE_BYTES
+        ]
     
-    # Sort by timestamp (most recent first)
-    runs.sort(key=lambda x: x['timestamp'] if x['timestamp'] else '', reverse=True)
+    runs = []
+    for run in _scan_run_headers(csv_files, max_workers):
+        if run is None:
+            continue
+        distance = run['distance_km']
+        if distance is not None and distance >= min_distance_km:
+            runs.append(run)
+    
+    # Sort by timestamp (most recent first). Timestamps are parsed once into
+    # int64 ticks; missing or unparseable ones become NaT (the int64
+    # minimum) and end up last. Inverting the bits flips the order without
+    # overflow, so a stable argsort keeps ties in scan order.
+    timestamps = pd.to_datetime([run['timestamp'] for run in runs], format='ISO8601', utc=True, errors='coerce')
+    order = np.argsort(~timestamps.asi8, kind='stable')
+    
+    return [runs[i] for i in order[:top_n]]
+
+
+class ChannelStats(NamedTuple):
+    """Summary statistics of one telemetry channel."""
+    mean: float
+    std: float
+    min: float
+    max: float
+    first_half_avg: float
+    second_half_avg: float
+
+
+def _first_column(columns: AbstractSet[str], candidates: Tuple[str, ...]) -> Optional[str]:
+    """Return the first candidate present in a set of column names."""
+    for col in candidates:
+        if col in columns:
+            return col
+    return None
+
+
+class RunColumns(NamedTuple):
+    """Source column chosen for each field of a run (None if absent)."""
+    distance: Optional[str]
+    start_time: Optional[str]
+    hr: Optional[str]
+    cadence: Optional[str]
+    speed: Optional[str]
+
+
+def resolve_columns(df: pd.DataFrame) -> RunColumns:
+    """
+    Pick the source column for every field in one pass over the DataFrame's columns.
     
-    return runs[:top_n]
+    Returns:
+        RunColumns naming the column to read for each field
+    """
+    columns = set(df.columns)
+    return RunColumns(
+        distance=_first_column(columns, DISTANCE_COLUMNS),
+        start_time=_first_column(columns, START_TIME_COLUMNS),
+        hr=_first_column(columns, HR_COLUMNS),
+        cadence=_first_column(columns, CADENCE_COLUMNS),
+        speed=_first_column(columns, SPEED_COLUMNS)
+    )
 
 
-def calculate_hr_stability(df: pd.DataFrame) -> Dict[str, float]:
+if NUMBA_AVAILABLE:
+    # fastmath is left off: it lets LLVM assume no NaNs and drop the isnan checks
+    @njit(cache=True)
+    def _stability_kernel(values):
+        """Count, mean, std, min, max and half means of the non-NaN samples."""
+        n = 0
+        for i in range(values.size):
+            if not np.isnan(values[i]):
+                n += 1
+        if n < 10:
+            return n, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        
+        # Single pass: Welford's running mean/variance plus the half sums
+        mid_point = n // 2
+        first_half_sum = 0.0
+        second_half_sum = 0.0
+        lo = np.inf
+        hi = -np.inf
+        mean = 0.0
+        m2 = 0.0
+        k = 0
+        for i in range(values.size):
+            x = values[i]
+            if np.isnan(x):
+                continue
+            k += 1
+            delta = x - mean
+            mean += delta / k
+            m2 += delta * (x - mean)
+            if k <= mid_point:
+                first_half_sum += x
+            else:
+                second_half_sum += x
+            if x < lo:
+                lo = x
+            if x > hi:
+                hi = x
+        std = np.sqrt(m2 / (n - 1))
+        
+        return n, mean, std, lo, hi, first_half_sum / mid_point, second_half_sum / (n - mid_point)
+
+
+def _channel_stats(values: np.ndarray) -> Optional[ChannelStats]:
     """
-    Calculate heart rate stability metrics.
+    Summarise a telemetry channel with NumPy reductions on its raw values.
+    
+    Uses the compiled kernel when numba is installed.
     
+    Sums are accumulated in float64 even though samples are stored as float32.
+    
+    Args:
+        values: float32 samples of the channel, NaN where missing
+        
     Returns:
-        Dictionary with HR stability metrics
+        ChannelStats, or None if the channel has fewer than 10 valid samples
     """
-    if 'heart_rate' not in df.columns:
-        return {'stability_score': 0, 'cv': 100, 'drift': 0}
+    if NUMBA_AVAILABLE:
+        n, mean, std, lo, hi, first_half_avg, second_half_avg = _stability_kernel(values)
+        if n < 10:
+            return None
+        return ChannelStats(mean, std, lo, hi, first_half_avg, second_half_avg)
+    
+    values = values[~np.isnan(values)]
     
-    hr_data = df['heart_rate'].dropna()
+    if values.size < 10:
+        return None
     
-    if len(hr_data) < 10:
+    # Split into first and second half; both half sums come from one reduction
+    mid_point = values.size // 2
+    first_half_sum, second_half_sum = np.add.reduceat(values, [0, mid_point], dtype=np.float64)
+    mean = (first_half_sum + second_half_sum) / values.size
+    
+    # Reuse the mean for the deviations instead of letting std() recompute it
+    deviations = values - mean
+    return ChannelStats(
+        mean=mean,
+        std=np.sqrt(np.dot(deviations, deviations) / (values.size - 1)),
+        min=float(values.min()),
+        max=float(values.max()),
+        first_half_avg=first_half_sum / mid_point,
+        second_half_avg=second_half_sum / (values.size - mid_point)
+    )
+
+
+def _column_stats(df: pd.DataFrame, col: str) -> Optional[ChannelStats]:
+    """Summarise a single DataFrame column."""
+    return _channel_stats(df[col].to_numpy(dtype=np.float32, na_value=np.nan))
+
+
+def _hr_metrics(hr: Optional[ChannelStats]) -> Dict[str, float]:
+    """Build heart rate stability metrics from channel statistics."""
+    if hr is None:
         return {'stability_score': 0, 'cv': 100, 'drift': 0}
     
     # Calculate coefficient of variation (lower is better)
-    cv = (hr_data.std() / hr_data.mean() * 100) if hr_data.mean() > 0 else 100
+    cv = (hr.std / hr.mean * 100) if hr.mean > 0 else 100
     
     # Calculate HR drift (increase over time)
-    # Split into first and second half
-    mid_point = len(hr_data) // 2
-    first_half_avg = hr_data.iloc[:mid_point].mean()
-    second_half_avg = hr_data.iloc[mid_point:].mean()
-    drift = second_half_avg - first_half_avg
+    drift = hr.second_half_avg - hr.first_half_avg
     
     # Stability score: 0-100 (higher is better)
     # Good stability: CV < 5%, drift < 5 bpm
@@ -104,41 +491,22 @@ def calculate_hr_stability(df: pd.DataFrame) -> Dict[str, float]:
         'stability_score': stability_score,
         'cv': cv,
         'drift': drift,
-        'avg_hr': hr_data.mean(),
-        'min_hr': hr_data.min(),
-        'max_hr': hr_data.max()
+        'avg_hr': hr.mean,
+        'min_hr': hr.min,
+        'max_hr': hr.max
     }
 
 
-def calculate_cadence_stability(df: pd.DataFrame) -> Dict[str, float]:
-    """
-    Calculate cadence stability metrics.
-    
-    Returns:
-        Dictionary with cadence stability metrics
-    """
-    cadence_col = None
-    for col in ['cadence', 'running_cadence', 'session_avg_running_cadence']:
-        if col in df.columns:
-            cadence_col = col
-            break
-    
-    if not cadence_col:
-        return {'stability_score': 0, 'cv': 100, 'degradation': 0}
-    
-    cadence_data = df[cadence_col].dropna()
-    
-    if len(cadence_data) < 10:
+def _cadence_metrics(cadence: Optional[ChannelStats]) -> Dict[str, float]:
+    """Build cadence stability metrics from channel statistics."""
+    if cadence is None:
         return {'stability_score': 0, 'cv': 100, 'degradation': 0}
     
     # Calculate coefficient of variation
-    cv = (cadence_data.std() / cadence_data.mean() * 100) if cadence_data.mean() > 0 else 100
+    cv = (cadence.std / cadence.mean * 100) if cadence.mean > 0 else 100
     
     # Calculate cadence degradation (decrease over time)
-    mid_point = len(cadence_data) // 2
-    first_half_avg = cadence_data.iloc[:mid_point].mean()
-    second_half_avg = cadence_data.iloc[mid_point:].mean()
-    degradation = first_half_avg - second_half_avg  # Positive = degradation
+    degradation = cadence.first_half_avg - cadence.second_half_avg  # Positive = degradation
     
     # Stability score: 0-100 (higher is better)
     # Good stability: CV < 3%, degradation < 2 spm
@@ -148,39 +516,20 @@ def calculate_cadence_stability(df: pd.DataFrame) -> Dict[str, float]:
         'stability_score': stability_score,
         'cv': cv,
         'degradation': degradation,
-        'avg_cadence': cadence_data.mean(),
-        'min_cadence': cadence_data.min(),
-        'max_cadence': cadence_data.max()
+        'avg_cadence': cadence.mean,
+        'min_cadence': cadence.min,
+        'max_cadence': cadence.max
     }
 
 
-def calculate_pace_stability(df: pd.DataFrame) -> Dict[str, float]:
-    """
-    Calculate pace stability and degradation metrics.
-    
-    Returns:
-        Dictionary with pace stability metrics
-    """
-    # Try to get speed data
-    speed_col = None
-    for col in ['speed', 'enhanced_speed', 'session_avg_speed']:
-        if col in df.columns:
-            speed_col = col
-            break
-    
-    if not speed_col:
-        return {'stability_score': 0, 'degradation': 0}
-    
-    speed_data = df[speed_col].dropna()
-    
-    if len(speed_data) < 10:
+def _pace_metrics(speed: Optional[ChannelStats]) -> Dict[str, float]:
+    """Build pace stability metrics from speed channel statistics."""
+    if speed is None:
         return {'stability_score': 0, 'degradation': 0}
     
     # Calculate pace degradation (slower over time)
-    mid_point = len(speed_data) // 2
-    first_half_avg = speed_data.iloc[:mid_point].mean()
-    second_half_avg = speed_data.iloc[mid_point:].mean()
-    degradation = first_half_avg - second_half_avg  # Positive = got slower
+    first_half_avg = speed.first_half_avg
+    second_half_avg = speed.second_half_avg
     
     # Convert to pace degradation (seconds per km)
     if first_half_avg > 0 and second_half_avg > 0:
@@ -197,10 +546,97 @@ def calculate_pace_stability(df: pd.DataFrame) -> Dict[str, float]:
     return {
         'stability_score': stability_score,
         'degradation': pace_degradation,
-        'avg_speed': speed_data.mean()
+        'avg_speed': speed.mean
     }
 
 
+def calculate_hr_stability(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Calculate heart rate stability metrics.
+    
+    Returns:
+        Dictionary with HR stability metrics
+    """
+    hr_col = resolve_columns(df).hr
+    if not hr_col:
+        return _hr_metrics(None)
+    return _hr_metrics(_column_stats(df, hr_col))
+
+
+def calculate_cadence_stability(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Calculate cadence stability metrics.
+    
+    Returns:
+        Dictionary with cadence stability metrics
+    """
+    cadence_col = resolve_columns(df).cadence
+    if not cadence_col:
+        return _cadence_metrics(None)
+    return _cadence_metrics(_column_stats(df, cadence_col))
+
+
+def calculate_pace_stability(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Calculate pace stability and degradation metrics.
+    
+    Returns:
+        Dictionary with pace stability metrics
+    """
+    speed_col = resolve_columns(df).speed
+    if not speed_col:
+        return _pace_metrics(None)
+    return _pace_metrics(_column_stats(df, speed_col))
+
+
+class RunChannels(NamedTuple):
+    """Per-sample telemetry of a run as float32 arrays (NaN where missing)."""
+    hr: Optional[np.ndarray]
+    cadence: Optional[np.ndarray]
+    speed: Optional[np.ndarray]
+
+
+def extract_channels(df: pd.DataFrame, columns: Optional[RunColumns] = None) -> RunChannels:
+    """
+    Pull the HR, cadence and speed channels out of a run DataFrame.
+    
+    The channels are converted in a single to_numpy call; once extracted the
+    DataFrame is no longer needed for scoring.
+    
+    Args:
+        df: Run data
+        columns: Already-resolved columns of df (resolved here when omitted)
+        
+    Returns:
+        RunChannels with None for channels the file doesn't have
+    """
+    if columns is None:
+        columns = resolve_columns(df)
+    channel_cols = [columns.hr, columns.cadence, columns.speed]
+    present = [col for col in channel_cols if col]
+    
+    arrays = {}
+    if present:
+        values = df[present].to_numpy(dtype=np.float32, na_value=np.nan)
+        arrays = {col: np.ascontiguousarray(values[:, i]) for i, col in enumerate(present)}
+    
+    return RunChannels(*(arrays.get(col) for col in channel_cols))
+
+
+def compute_all_stability(channels: RunChannels) -> Tuple[Dict, Dict, Dict]:
+    """
+    Calculate HR, cadence and pace stability metrics from the channel arrays.
+    
+    Returns:
+        Tuple of (hr_metrics, cadence_metrics, pace_metrics)
+    """
+    return (
+        _hr_metrics(_channel_stats(channels.hr) if channels.hr is not None else None),
+        _cadence_metrics(_channel_stats(channels.cadence) if channels.cadence is not None else None),
+        _pace_metrics(_channel_stats(channels.speed) if channels.speed is not None else None)
+    )
+
+
 def score_long_run(df: pd.DataFrame) -> Tuple[str, Dict]:
     """
     Score a long run as A, B, or C.
@@ -208,25 +644,88 @@ def score_long_run(df: pd.DataFrame) -> Tuple[str, Dict]:
     Returns:
         Tuple of (grade, analysis_dict)
     """
-    hr_metrics = calculate_hr_stability(df)
-    cadence_metrics = calculate_cadence_stability(df)
-    pace_metrics = calculate_pace_stability(df)
+    return score_channels(extract_channels(df))
+
+
+@dataclass(slots=True)
+class RunAnalysis:
+    """Graded analysis of one long run."""
+    filename: str
+    distance_km: Optional[float]
+    timestamp: Optional[str]
+    grade: str
+    recommendation: str
+    hr_metrics: Dict[str, float]
+    cadence_metrics: Dict[str, float]
+    pace_metrics: Dict[str, float]
+    hr_stable: bool
+    cadence_stable: bool
+    pace_stable: bool
+    
+    def analysis_dict(self) -> Dict:
+        """Get the analysis in the dictionary layout returned by score_long_run."""
+        return {
+            'grade': self.grade,
+            'recommendation': self.recommendation,
+            'hr_metrics': self.hr_metrics,
+            'cadence_metrics': self.cadence_metrics,
+            'pace_metrics': self.pace_metrics,
+            'hr_stable': self.hr_stable,
+            'cadence_stable': self.cadence_stable,
+            'pace_stable': self.pace_stable
+        }
+
+
+def score_channels(channels: RunChannels) -> Tuple[str, Dict]:
+    """
+    Score a long run as A, B, or C from its channel arrays.
+    
+    Returns:
+        Tuple of (grade, analysis_dict)
+    """
+    run = grade_channels(channels)
+    return run.grade, run.analysis_dict()
+
+
+def grade_channels(channels: RunChannels, filename: str = '', distance_km: Optional[float] = None,
+                   timestamp: Optional[str] = None) -> RunAnalysis:
+    """
+    Grade a long run from its channel arrays.
+    
+    Args:
+        channels: HR, cadence and speed samples of the run
+        filename: Name of the run file
+        distance_km: Run distance in km
+        timestamp: Run start time
+        
+    Returns:
+        RunAnalysis with the grade and the per-channel metrics
+    """
+    hr_metrics, cadence_metrics, pace_metrics = compute_all_stability(channels)
     
     # Scoring criteria:
     # A Run: HR stable, Cadence stable, No significant degradation
     # B Run: HR drift but controlled, Minor form loss
     # C Run: HR + pace + cadence all degrade
     
-    hr_stable = hr_metrics['cv'] < 8 and abs(hr_metrics['drift']) < 8
-    cadence_stable = cadence_metrics['cv'] < 5 and abs(cadence_metrics['degradation']) < 3
-    pace_stable = abs(pace_metrics['degradation']) < 0.5
+    # Look each metric up once; drift and degradation are checked both signed and unsigned
+    hr_cv = hr_metrics['cv']
+    hr_drift_abs = abs(hr_metrics['drift'])
+    cadence_cv = cadence_metrics['cv']
+    cadence_degradation = cadence_metrics['degradation']
+    pace_degradation = pace_metrics['degradation']
+    pace_degradation_abs = abs(pace_degradation)
+    
+    hr_stable = hr_cv < HR_CV_OK and hr_drift_abs < HR_DRIFT_OK
+    cadence_stable = cadence_cv < CAD_CV_OK and abs(cadence_degradation) < CAD_DEG_OK
+    pace_stable = pace_degradation_abs < PACE_DEG_OK
     
     # Check for significant degradation (C run criteria)
-    hr_degrading = abs(hr_metrics['drift']) > 15 or hr_metrics['cv'] > 12
-    cadence_degrading = cadence_metrics['degradation'] < -5 or cadence_metrics['cv'] > 8
-    pace_degrading = pace_metrics['degradation'] > 1.0
+    hr_degrading = hr_drift_abs > HR_DRIFT_BAD or hr_cv > HR_CV_BAD
+    cadence_degrading = cadence_degradation < CAD_DEG_BAD or cadence_cv > CAD_CV_BAD
+    pace_degrading = pace_degradation > PACE_DEG_BAD
     
-    hr_drift_controlled = abs(hr_metrics['drift']) < 15 and hr_metrics['cv'] < 12
+    hr_drift_controlled = hr_drift_abs < HR_DRIFT_BAD and hr_cv < HR_CV_BAD
     minor_form_loss = (not cadence_stable or not pace_stable) and not (cadence_degrading and pace_degrading)
     
     # Grade determination
@@ -240,134 +739,186 @@ def score_long_run(df: pd.DataFrame) -> Tuple[str, Dict]:
         grade = 'C'
         recommendation = "Reduce load next week"
     
-    analysis = {
-        'grade': grade,
-        'recommendation': recommendation,
-        'hr_metrics': hr_metrics,
-        'cadence_metrics': cadence_metrics,
-        'pace_metrics': pace_metrics,
-        'hr_stable': hr_stable,
-        'cadence_stable': cadence_stable,
-        'pace_stable': pace_stable
-    }
+    return RunAnalysis(
+        filename=filename,
+        distance_km=distance_km,
+        timestamp=timestamp,
+        grade=grade,
+        recommendation=recommendation,
+        hr_metrics=hr_metrics,
+        cadence_metrics=cadence_metrics,
+        pace_metrics=pace_metrics,
+        hr_stable=hr_stable,
+        cadence_stable=cadence_stable,
+        pace_stable=pace_stable
+    )
+
+
+def _analysis_cache_path(csv_file: str) -> str:
+    """
+    Get the cache file for a run CSV's analysis.
+    
+    The key covers the file's mtime and size, so an edited or re-exported
+    CSV maps to a new entry.
+    
+    Returns:
+        Path of the pickled analysis in ANALYSIS_CACHE_DIR
+    """
+    stat = os.stat(csv_file)
+    key = f"{ANALYSIS_CACHE_VERSION}|{os.path.abspath(csv_file)}|{stat.st_mtime_ns}|{stat.st_size}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(ANALYSIS_CACHE_DIR, f"{digest}.pkl")
+
+
+def _load_cached_analysis(cache_file: str) -> Optional[RunAnalysis]:
+    """
+    Load a cached analysis.
+    
+    Returns:
+        The cached RunAnalysis, or None on a miss or unreadable entry
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            return RunAnalysis(**pickle.load(f))
+    except Exception:
+        return None
+
+
+def _store_cached_analysis(cache_file: str, result: RunAnalysis) -> None:
+    """
+    Store an analysis in the cache; failures only cost a recomputation later.
     
-    return grade, analysis
+    The fields are stored as a plain dict: a pickled RunAnalysis refers to
+    its defining module, which is __main__ when this file runs as a script,
+    so it wouldn't load under the other entry point.
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(asdict(result), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except Exception:
+        pass
 
 
-def analyze_long_run(csv_file: str) -> Dict:
+def analyze_long_run(csv_file: str, df: Optional[pd.DataFrame] = None) -> Optional[RunAnalysis]:
     """
     Analyze a single long run file.
     
+    When the file is read from disk, the result is cached in
+    ANALYSIS_CACHE_DIR, so unchanged runs are not re-analyzed.
+    
+    Args:
+        csv_file: Path to the run CSV
+        df: Already-loaded run data; the file is only read when omitted
+        
     Returns:
-        Dictionary with analysis results
+        RunAnalysis for the run, or None if it couldn't be analyzed
     """
     try:
-        df = pd.read_csv(csv_file)
+        cache_file = None
+        if df is None:
+            cache_file = _analysis_cache_path(csv_file)
+            cached = _load_cached_analysis(cache_file)
+            if cached is not None:
+                return cached
+            df = load_run_data(csv_file)
+        
+        # Resolve every source column once
+        columns = resolve_columns(df)
         
         # Get basic info
         distance = None
-        if 'session_total_distance' in df.columns:
-            distance = df['session_total_distance'].iloc[0] / 1000.0
-        elif 'total_distance' in df.columns:
-            distance = df['total_distance'].iloc[0] / 1000.0
+        if columns.distance:
+            distance = df[columns.distance].iloc[0] / 1000.0
         
         timestamp = None
-        if 'session_start_time' in df.columns:
-            timestamp = df['session_start_time'].iloc[0]
-        elif 'timestamp' in df.columns:
-            timestamp = df['timestamp'].iloc[0]
+        if columns.start_time:
+            timestamp = df[columns.start_time].iloc[0]
         
-        # Score the run
-        grade, analysis = score_long_run(df)
+        # Keep only the channel arrays so the DataFrame can be freed before scoring
+        channels = extract_channels(df, columns)
+        del df
         
-        return {
-            'filename': os.path.basename(csv_file),
-            'distance_km': distance,
-            'timestamp': timestamp,
-            'grade': grade,
-            'analysis': analysis
-        }
+        # Score the run
+        result = grade_channels(channels, os.path.basename(csv_file), distance, timestamp)
+        if cache_file is not None:
+            _store_cached_analysis(cache_file, result)
+        return result
     except Exception as e:
         print(f"Error analyzing {csv_file}: {e}")
         return None
 
 
-def generate_report(runs: List[Dict]) -> str:
+def iter_report_lines(runs: List[RunAnalysis]) -> Iterator[str]:
     """
-    Generate a formatted report for the long runs.
+    Yield the formatted report for the long runs line by line.
+    
+    Lines carry no trailing newline, so the caller can stream them straight
+    to a file or buffer without building the whole report first.
     
     Returns:
-        Formatted report string
+        Iterator over report lines
     """
-    report = []
-    report.append("🏃 LONG RUN QUALITY SCORING ANALYSIS")
-    report.append("=" * 80)
-    report.append("")
-    report.append("Scoring Criteria:")
-    report.append("  A Run: HR stable, Cadence stable, Legs recover in 24-36h")
-    report.append("         ➡️ Progress volume or terrain")
-    report.append("")
-    report.append("  B Run: HR drift but controlled, Minor form loss")
-    report.append("         ➡️ Repeat similar load")
-    report.append("")
-    report.append("  C Run: HR + pace + cadence all degrade")
-    report.append("         ➡️ Reduce load next week")
-    report.append("")
-    report.append("=" * 80)
-    report.append("")
+    yield from REPORT_HEADER
     
     for i, run in enumerate(runs, 1):
         if run is None:
             continue
             
-        report.append(f"RUN #{i}: {run['filename']}")
-        report.append("-" * 80)
-        report.append(f"Distance: {run['distance_km']:.2f} km")
-        report.append(f"Date: {run['timestamp']}")
-        report.append("")
-        
-        analysis = run['analysis']
-        grade = analysis['grade']
+        yield f"RUN #{i}: {run.filename}"
+        yield "-" * 80
+        yield f"Distance: {run.distance_km:.2f} km"
+        yield f"Date: {run.timestamp}"
+        yield ""
         
         # Grade display
-        grade_emoji = {'A': '🟢', 'B': '🟡', 'C': '🔴'}
-        report.append(f"{grade_emoji[grade]} GRADE: {grade}")
-        report.append(f"   Recommendation: {analysis['recommendation']}")
-        report.append("")
+        yield f"{GRADE_EMOJI[run.grade]} GRADE: {run.grade}"
+        yield f"   Recommendation: {run.recommendation}"
+        yield ""
         
         # HR Metrics
-        hr = analysis['hr_metrics']
-        report.append("💓 Heart Rate Analysis:")
-        report.append(f"   Average HR: {hr['avg_hr']:.0f} bpm")
-        report.append(f"   HR Range: {hr['min_hr']:.0f} - {hr['max_hr']:.0f} bpm")
-        report.append(f"   Stability (CV): {hr['cv']:.1f}% {'✓' if hr['cv'] < 8 else '⚠'}")
-        report.append(f"   HR Drift: {hr['drift']:+.1f} bpm {'✓' if abs(hr['drift']) < 8 else '⚠'}")
-        report.append(f"   Status: {'Stable' if analysis['hr_stable'] else 'Drift detected'}")
-        report.append("")
+        hr = run.hr_metrics
+        yield "💓 Heart Rate Analysis:"
+        yield f"   Average HR: {hr['avg_hr']:.0f} bpm"
+        yield f"   HR Range: {hr['min_hr']:.0f} - {hr['max_hr']:.0f} bpm"
+        yield f"   Stability (CV): {hr['cv']:.1f}% {'✓' if hr['cv'] < HR_CV_OK else '⚠'}"
+        yield f"   HR Drift: {hr['drift']:+.1f} bpm {'✓' if abs(hr['drift']) < HR_DRIFT_OK else '⚠'}"
+        yield f"   Status: {'Stable' if run.hr_stable else 'Drift detected'}"
+        yield ""
         
         # Cadence Metrics
-        cad = analysis['cadence_metrics']
-        report.append("👣 Cadence Analysis:")
-        report.append(f"   Average Cadence: {cad['avg_cadence']:.0f} spm")
-        report.append(f"   Stability (CV): {cad['cv']:.1f}% {'✓' if cad['cv'] < 5 else '⚠'}")
-        report.append(f"   Degradation: {cad['degradation']:+.1f} spm {'✓' if cad['degradation'] < 3 else '⚠'}")
-        report.append(f"   Status: {'Stable' if analysis['cadence_stable'] else 'Form loss detected'}")
-        report.append("")
+        cad = run.cadence_metrics
+        yield "👣 Cadence Analysis:"
+        yield f"   Average Cadence: {cad['avg_cadence']:.0f} spm"
+        yield f"   Stability (CV): {cad['cv']:.1f}% {'✓' if cad['cv'] < CAD_CV_OK else '⚠'}"
+        yield f"   Degradation: {cad['degradation']:+.1f} spm {'✓' if cad['degradation'] < CAD_DEG_OK else '⚠'}"
+        yield f"   Status: {'Stable' if run.cadence_stable else 'Form loss detected'}"
+        yield ""
         
         # Pace Metrics
-        pace = analysis['pace_metrics']
-        report.append("⚡ Pace Analysis:")
+        pace = run.pace_metrics
+        yield "⚡ Pace Analysis:"
         if pace['avg_speed']:
             avg_pace_min = (1000.0 / pace['avg_speed']) / 60.0
-            report.append(f"   Average Pace: {int(avg_pace_min)}:{int((avg_pace_min - int(avg_pace_min)) * 60):02d}/km")
-        report.append(f"   Pace Degradation: {pace['degradation']:+.2f} min/km {'✓' if abs(pace['degradation']) < 0.5 else '⚠'}")
-        report.append(f"   Status: {'Stable' if analysis['pace_stable'] else 'Degradation detected'}")
-        report.append("")
+            yield f"   Average Pace: {int(avg_pace_min)}:{int((avg_pace_min - int(avg_pace_min)) * 60):02d}/km"
+        yield f"   Pace Degradation: {pace['degradation']:+.2f} min/km {'✓' if abs(pace['degradation']) < PACE_DEG_OK else '⚠'}"
+        yield f"   Status: {'Stable' if run.pace_stable else 'Degradation detected'}"
+        yield ""
         
-        report.append("=" * 80)
-        report.append("")
+        yield "=" * 80
+        yield ""
+
+
+def generate_report(runs: List[RunAnalysis]) -> str:
+    """
+    Generate a formatted report for the long runs.
     
-    return "\n".join(report)
+    Returns:
+        Formatted report string
+    """
+    return "\n".join(iter_report_lines(runs))
 
 
 if __name__ == "__main__":
@@ -384,15 +935,18 @@ if __name__ == "__main__":
     print("Analyzing...")
     print("")
     
-    analyzed_runs = []
-    for run_info in long_runs:
-        analysis = analyze_long_run(run_info['file'])
-        if analysis:
-            analyzed_runs.append(analysis)
-    
-    # Generate report
-    report = generate_report(analyzed_runs)
-    print(report)
+    # Each run is analysed independently; pool.map keeps the most-recent-first order
+    with ProcessPoolExecutor() as pool:
+        analyses = pool.map(analyze_long_run, [run_info['file'] for run_info in long_runs])
+        analyzed_runs = [analysis for analysis in analyses if analysis]
+    
+    # Generate report once into a buffer, then echo and save it
+    buffer = io.StringIO()
+    for line in iter_report_lines(analyzed_runs):
+        buffer.write(line)
+        buffer.write("\n")
+    report = buffer.getvalue()
+    print(report, end="")
     
     # Save report
     output_file = "/Users/hongtang/Documents/coros_fit/long_run_analysis.txt"
@@ -4,18 +4,243 @@ Analyze Coros FIT files and generate Strava-style comments and workout suggestio
 """
 
 import os
-import glob
+import hashlib
+import heapq
+import io
+import pickle
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from fitparse import FitFile
+from functools import lru_cache, partial
+from convert_fit_to_csv import open_fit_messages
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import json
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
 
-def parse_fit_file(file_path: str) -> Optional[Dict]:
-    """Parse a FIT file and extract workout data."""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Per-sample fields kept from 'record' messages, with the dtype of their column
+# (missing samples become NaN / NaT)
+RECORD_FIELDS = {
+    'timestamp': 'datetime64[s]',
+    'distance': np.float32,  # meters
+    'speed': np.float32,  # m/s
+    'heart_rate': np.float32,
+    'cadence': np.float32,
+    'altitude': np.float32,
+}
+
+# Record fields parse_fit_file's summary stats are computed from
+SUMMARY_RECORD_FIELDS = ('timestamp', 'speed', 'heart_rate', 'altitude')
+
+# Fixed blocks of the training recommendations text
+RECOMMENDATIONS_HEADER = "🎯 OVERALL TRAINING RECOMMENDATIONS\n" + "=" * 80 + "\n\n"
+INTENSE_TRAINING_ADVICE = (
+    "  ⚠️  Your recent workouts have been very intense!\n"
+    "     → Add more easy/recovery runs (60-70% max HR)\n"
+    "     → Follow the 80/20 rule: 80% easy, 20% hard\n"
+)
+BASE_BUILDING_ADVICE = (
+    "  🎯 Great base building! Time to add some intensity:\n"
+    "     → Include 1-2 interval sessions per week\n"
+    "     → Add tempo runs (comfortably hard pace)\n"
+)
+WEEKLY_PLAN = (
+    "\n"
+    "📅 Weekly Training Plan Suggestion:\n"
+    "  • Monday: Easy run (60-70% max HR)\n"
+    "  • Wednesday: Interval or tempo run\n"
+    "  • Friday: Easy run or rest\n"
+    "  • Sunday: Long run (70-80% max HR)\n"
+    "\n"
+    "💪 Remember: Consistency > Intensity\n"
+    "   Recovery is just as important as training!"
+)
+
+# Parsed workouts are cached as parquet, keyed by FIT path, mtime and size.
+# Bump PARSE_CACHE_VERSION whenever parse_fit_file's output changes.
+PARSE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'coros_fit', 'parsed')
+PARSE_CACHE_VERSION = 2
+
+# FIT message types parse_fit_file reads; the rest are skipped
+FIT_MESSAGES = ('record', 'session', 'file_id', 'sport', 'user_profile')
+
+# Session field -> (workout_data key, default used when the value is missing or zero)
+SESSION_FIELDS = {
+    'total_distance': ('total_distance', 0.0),
+    'total_elapsed_time': ('total_time', 0.0),
+    'avg_heart_rate': ('avg_heart_rate', None),
+    'max_heart_rate': ('max_heart_rate', None),
+    'total_ascent': ('total_elevation_gain', 0.0),
+    'total_calories': ('calories', 0),
+    'avg_cadence': ('avg_cadence', None),
+}
+
+# Max heart rate assumed when the athlete's age is unknown (typical for adults)
+DEFAULT_MAX_HR = 190
+
+# Heart rate zones by percent of max HR: a zone starts at its lower edge
+HR_ZONE_EDGES = (60, 70, 80, 90)
+HR_ZONE_NAMES = (
+    "Zone 1 (Recovery)",
+    "Zone 2 (Easy)",
+    "Zone 3 (Aerobic)",
+    "Zone 4 (Threshold)",
+    "Zone 5 (Maximum)",
+)
+_HR_ZONE_EDGES_ARRAY = np.array(HR_ZONE_EDGES, dtype=np.float64)
+_HR_ZONE_NAMES_ARRAY = np.array(HR_ZONE_NAMES)
+
+# Sport name keyword -> activity type, checked in order
+SPORT_KEYWORDS = {
+    'run': 'running',
+    'walk': 'walking',
+    'hike': 'walking',
+    'bike': 'cycling',
+    'cycling': 'cycling',
+}
+
+
+def _parse_cache_path(file_path: str) -> str:
+    """
+    Get the cache file for a FIT file's parsed workout.
+    
+    The key covers the file's mtime and size, so a re-synced FIT file maps
+    to a new entry.
+    
+    Returns:
+        Path of the parquet file in PARSE_CACHE_DIR
+    """
+    stat = os.stat(file_path)
+    key = f"{PARSE_CACHE_VERSION}|{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(PARSE_CACHE_DIR, f"{digest}.parquet")
+
+
+def _read_cached_records(cache_file: str, memory_map: bool = False) -> Dict[str, np.ndarray]:
+    """Read the record arrays of a cached workout from its parquet columns."""
+    table = pq.read_table(cache_file, memory_map=memory_map)
+    return {name: table.column(name).to_numpy().astype(dtype, copy=False) for name, dtype in RECORD_FIELDS.items()}
+
+
+def _load_cached_workout(cache_file: str, include_records: bool = True) -> Optional[Dict]:
+    """
+    Load a cached workout: the workout fields from the pickled schema
+    metadata, and the record arrays from the parquet columns if requested.
+    
+    Returns:
+        The cached workout data, or None on a miss or unreadable entry
+    """
+    try:
+        workout_data = pickle.loads(pq.read_schema(cache_file).metadata[b'workout'])
+        if include_records:
+            workout_data['records'] = _read_cached_records(cache_file)
+        return workout_data
+    except Exception:
+        return None
+
+
+def _store_cached_workout(cache_file: str, workout_data: Dict) -> None:
+    """
+    Store a parsed workout in the cache; failures only cost a re-parse later.
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fields = {key: value for key, value in workout_data.items() if key != 'records'}
+        table = pa.table(workout_data['records'])
+        table = table.replace_schema_metadata({b'workout': pickle.dumps(fields, protocol=pickle.HIGHEST_PROTOCOL)})
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_file, compression='zstd')
+        os.replace(tmp_file, cache_file)
+    except Exception:
+        pass
+
+
+def parse_fit_file(file_path: str, include_records: bool = True) -> Optional[Dict]:
+    """
+    Parse a FIT file and extract workout data.
+    
+    The per-sample track is returned under 'records' as one NumPy array per
+    field in RECORD_FIELDS, all of the same length.
+    
+    With pyarrow installed, parsed workouts are cached in PARSE_CACHE_DIR so
+    unchanged files are not re-parsed; 'records_file' then names the parquet
+    file holding the record arrays (see load_workout_records).
+    
+    Args:
+        file_path: Path to the FIT file
+        include_records: Return the record arrays; when False only the
+            summary fields are returned (the stats derived from the records,
+            such as max_pace and time_in_zone, are still computed)
+    """
+    if not PARQUET_AVAILABLE:
+        return _read_fit_file(file_path, include_records)
+    
     try:
-        fitfile = FitFile(file_path)
+        cache_file = _parse_cache_path(file_path)
+    except OSError:
+        return _read_fit_file(file_path, include_records)
+    
+    workout_data = _load_cached_workout(cache_file, include_records)
+    if workout_data is None:
+        # The cache entry holds every record field, whatever this call needs
+        workout_data = _read_fit_file(file_path)
+        if workout_data is None:
+            return None
+        _store_cached_workout(cache_file, workout_data)
+        if not include_records:
+            del workout_data['records']
+        if not os.path.exists(cache_file):
+            return workout_data
+    workout_data['records_file'] = cache_file
+    return workout_data
+
+
+def load_workout_records(workout: Dict) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Get a workout's record arrays, reading them back from the parse cache
+    when the workout was returned without them.
+    
+    The cached parquet file is memory-mapped, so the arrays aren't copied
+    through a worker process's result.
+    
+    Returns:
+        Record arrays keyed by RECORD_FIELDS, or None if they aren't available
+    """
+    if 'records' in workout:
+        return workout['records']
+    records_file = workout.get('records_file')
+    if not records_file or not PARQUET_AVAILABLE:
+        return None
+    try:
+        return _read_cached_records(records_file, memory_map=True)
+    except Exception:
+        return None
+
+
+def _read_fit_file(file_path: str, include_records: bool = True) -> Optional[Dict]:
+    """
+    Parse a FIT file (with fitdecode, or fitparse without it); see parse_fit_file.
+    
+    Without include_records only the SUMMARY_RECORD_FIELDS columns are
+    accumulated, and they are dropped once the summary stats are computed.
+    """
+    try:
+        messages = open_fit_messages(file_path, FIT_MESSAGES)
         
         # Initialize data dictionary
         workout_data = {
@@ -32,59 +257,48 @@ def parse_fit_file(file_path: str) -> Optional[Dict]:
             'total_elevation_gain': 0.0,  # meters
             'calories': 0,
             'temperature': None,
-            'records': []
+            'age': None,
+            'records': {},
+            'time_in_zone': None,  # seconds per HR zone, aligned with HR_ZONE_NAMES
+            'estimated_max_hr': DEFAULT_MAX_HR,  # max HR the zones are computed against
         }
         
-        # Parse messages
-        for record in fitfile.get_messages('file_id'):
-            for field in record:
-                if field.name == 'time_created':
-                    workout_data['timestamp'] = field.value
-        
-        for record in fitfile.get_messages('sport'):
-            for field in record:
-                if field.name == 'sport':
-                    workout_data['sport'] = field.value
+        record_fields = RECORD_FIELDS if include_records else {name: RECORD_FIELDS[name] for name in SUMMARY_RECORD_FIELDS}
+        columns = {name: [] for name in record_fields}
+        session_fields = set()
         
-        # Parse session data
-        for record in fitfile.get_messages('session'):
-            for field in record:
-                if field.name == 'total_distance':
-                    workout_data['total_distance'] = field.value or 0.0
-                elif field.name == 'total_elapsed_time':
-                    workout_data['total_time'] = field.value or 0.0
-                elif field.name == 'avg_heart_rate':
-                    workout_data['avg_heart_rate'] = field.value
-                elif field.name == 'max_heart_rate':
-                    workout_data['max_heart_rate'] = field.value
-                elif field.name == 'total_ascent':
-                    workout_data['total_elevation_gain'] = field.value or 0.0
-                elif field.name == 'total_calories':
-                    workout_data['calories'] = field.value or 0
-                elif field.name == 'avg_cadence':
-                    workout_data['avg_cadence'] = field.value
-        
-        # Parse record data for detailed analysis
-        records = []
-        for record in fitfile.get_messages('record'):
-            record_data = {}
-            for field in record:
-                if field.name == 'distance':
-                    record_data['distance'] = field.value
-                elif field.name == 'speed':
-                    record_data['speed'] = field.value  # m/s
-                elif field.name == 'heart_rate':
-                    record_data['heart_rate'] = field.value
-                elif field.name == 'cadence':
-                    record_data['cadence'] = field.value
-                elif field.name == 'altitude':
-                    record_data['altitude'] = field.value
-                elif field.name == 'timestamp':
-                    record_data['timestamp'] = field.value
-            if record_data:
-                records.append(record_data)
+        # Read the file in a single pass, dispatching on the message type
+        for name, values in messages:
+            if name == 'record':
+                # Record data for detailed analysis (speed in m/s)
+                if not values.keys().isdisjoint(record_fields):
+                    for column_name, column in columns.items():
+                        column.append(values.get(column_name))
+            
+            elif name == 'session':
+                session_fields.update(values)
+                for field_name, (key, default) in SESSION_FIELDS.items():
+                    if field_name in values:
+                        value = values[field_name]
+                        workout_data[key] = value if default is None else (value or default)
+            
+            elif name == 'file_id':
+                if 'time_created' in values:
+                    workout_data['timestamp'] = values['time_created']
+            
+            elif name == 'sport':
+                if 'sport' in values:
+                    workout_data['sport'] = values['sport']
+            
+            elif name == 'user_profile':
+                if 'age' in values:
+                    workout_data['age'] = values['age']
         
-        workout_data['records'] = records
+        records = {name: np.array(column, dtype=record_fields[name]) for name, column in columns.items()}
+        if include_records:
+            workout_data['records'] = records
+        else:
+            del workout_data['records']
         
         # Calculate pace from distance and time
         if workout_data['total_distance'] > 0 and workout_data['total_time'] > 0:
@@ -94,13 +308,20 @@ def parse_fit_file(file_path: str) -> Optional[Dict]:
             if distance_km > 0:
                 workout_data['avg_pace'] = (workout_data['total_time'] / distance_km) / 60.0  # minutes per km
         
-        # Calculate max pace from records
-        if records:
-            speeds = [r.get('speed', 0) for r in records if r.get('speed')]
-            if speeds:
-                max_speed = max(speeds)  # m/s
-                if max_speed > 0:
-                    workout_data['max_pace'] = (1000.0 / max_speed) / 60.0  # minutes per km
+        # Calculate max pace from records; their HR and elevation stand in for
+        # session values the file doesn't provide
+        max_speed, mean_hr, elevation_gain = record_stats(records)
+        if max_speed > 0:
+            workout_data['max_pace'] = (1000.0 / max_speed) / 60.0  # minutes per km
+        if workout_data['avg_heart_rate'] is None and mean_hr is not None:
+            workout_data['avg_heart_rate'] = round(mean_hr)
+        if 'total_ascent' not in session_fields:
+            workout_data['total_elevation_gain'] = elevation_gain
+        
+        # Time spent in each HR zone, against the athlete's max HR when their age is known
+        max_hr = estimate_max_heart_rate(workout_data['age'], formula='tanaka')
+        workout_data['estimated_max_hr'] = max_hr
+        workout_data['time_in_zone'] = time_in_heart_rate_zones(records['heart_rate'], records['timestamp'], max_hr)
         
         return workout_data if workout_data['timestamp'] else None
         
@@ -109,40 +330,116 @@ def parse_fit_file(file_path: str) -> Optional[Dict]:
         return None
 
 
-def estimate_max_heart_rate(age: Optional[int] = None) -> int:
-    """Estimate max heart rate using age or default to 220 - age formula."""
-    # Default to 190 if age unknown (typical for adults)
+if NUMBA_AVAILABLE:
+    # fastmath is left off: it lets LLVM assume no NaNs and drop the isnan checks
+    @njit(cache=True)
+    def _record_stats_kernel(speed, heart_rate, altitude):
+        """Max speed, HR sum and count, and positive altitude change in one pass."""
+        max_speed = 0.0
+        hr_sum = 0.0
+        hr_count = 0
+        elevation_gain = 0.0
+        previous_altitude = np.nan
+        for i in range(speed.size):
+            if speed[i] > max_speed:
+                max_speed = speed[i]
+            if heart_rate[i] > 0:
+                hr_sum += heart_rate[i]
+                hr_count += 1
+            if not np.isnan(altitude[i]):
+                climb = altitude[i] - previous_altitude
+                if climb > 0:
+                    elevation_gain += climb
+                previous_altitude = altitude[i]
+        return max_speed, hr_sum, hr_count, elevation_gain
+
+
+def record_stats(records: Dict[str, np.ndarray]) -> Tuple[float, Optional[float], float]:
+    """
+    Reduce the per-sample track to its max speed, mean heart rate and elevation gain.
+    
+    Uses the compiled kernel when numba is installed. Missing samples are
+    skipped; elevation gain sums the climbs between consecutive altitudes.
+    
+    Args:
+        records: Record arrays as returned under 'records' by parse_fit_file
+        
+    Returns:
+        Tuple of max speed (m/s, 0 without speed data), mean heart rate
+        (None without HR data) and elevation gain (meters)
+    """
+    speed, heart_rate, altitude = records['speed'], records['heart_rate'], records['altitude']
+    if NUMBA_AVAILABLE:
+        max_speed, hr_sum, hr_count, elevation_gain = _record_stats_kernel(speed, heart_rate, altitude)
+    else:
+        # NaN gaps fail the > 0 tests
+        speeds = speed[speed > 0]
+        max_speed = float(speeds.max()) if speeds.size else 0.0
+        heart_rates = heart_rate[heart_rate > 0]
+        hr_sum, hr_count = heart_rates.sum(dtype=np.float64), heart_rates.size
+        climbs = np.diff(altitude[~np.isnan(altitude)].astype(np.float64))
+        elevation_gain = float(climbs[climbs > 0].sum())
+    
+    mean_hr = float(hr_sum / hr_count) if hr_count else None
+    return float(max_speed), mean_hr, float(elevation_gain)
+
+
+@lru_cache(maxsize=None)
+def estimate_max_heart_rate(age: Optional[int] = None, formula: str = 'fox') -> int:
+    """
+    Estimate max heart rate from age, or DEFAULT_MAX_HR if age is unknown.
+    
+    Args:
+        age: Athlete's age in years
+        formula: 'fox' (220 - age) or 'tanaka' (208 - 0.7 * age)
+    """
     if age is None:
-        return 190
+        return DEFAULT_MAX_HR
+    if formula == 'tanaka':
+        return round(208 - 0.7 * age)
     return 220 - age
 
 
 def get_heart_rate_zone(hr: int, max_hr: int) -> str:
     """Determine heart rate zone."""
     percentage = (hr / max_hr * 100) if max_hr > 0 else 0
-    
-    if percentage >= 90:
-        return "Zone 5 (Maximum)"
-    elif percentage >= 80:
-        return "Zone 4 (Threshold)"
-    elif percentage >= 70:
-        return "Zone 3 (Aerobic)"
-    elif percentage >= 60:
-        return "Zone 2 (Easy)"
-    else:
-        return "Zone 1 (Recovery)"
+    return HR_ZONE_NAMES[bisect_right(HR_ZONE_EDGES, percentage)]
+
+
+def get_heart_rate_zones(hrs: np.ndarray, max_hr: int) -> np.ndarray:
+    """Determine the heart rate zone of every sample in one vectorized lookup."""
+    percentages = np.asarray(hrs, dtype=np.float64) / max_hr * 100 if max_hr > 0 else np.zeros(np.shape(hrs))
+    return _HR_ZONE_NAMES_ARRAY[np.searchsorted(_HR_ZONE_EDGES_ARRAY, percentages, side='right')]
+
+
+def time_in_heart_rate_zones(heart_rates: np.ndarray, timestamps: np.ndarray, max_hr: int) -> np.ndarray:
+    """
+    Seconds spent in each heart rate zone, aligned with HR_ZONE_NAMES.
+    
+    Each sample counts for the time until the next one (1 s for the last
+    sample, or for every sample when timestamps are missing); samples
+    without a heart rate are ignored.
+    """
+    heart_rates = np.asarray(heart_rates, dtype=np.float64)
+    if max_hr <= 0 or not heart_rates.size:
+        return np.zeros(len(HR_ZONE_NAMES))
+    
+    seconds = np.ones(heart_rates.size)
+    if not np.isnat(timestamps).any():
+        seconds[:-1] = np.diff(timestamps).astype(np.float64)
+    
+    valid = ~np.isnan(heart_rates)
+    zones = np.searchsorted(_HR_ZONE_EDGES_ARRAY, heart_rates[valid] / max_hr * 100, side='right')
+    return np.bincount(zones, weights=seconds[valid], minlength=len(HR_ZONE_NAMES))
 
 
 def detect_activity_type(pace: Optional[float], sport: Optional[str]) -> str:
     """Detect if activity is running, walking, or other based on pace."""
     if sport:
         sport_lower = str(sport).lower()
-        if 'run' in sport_lower:
-            return 'running'
-        elif 'walk' in sport_lower or 'hike' in sport_lower:
-            return 'walking'
-        elif 'bike' in sport_lower or 'cycling' in sport_lower:
-            return 'cycling'
+        activity_type = next((activity for keyword, activity in SPORT_KEYWORDS.items() if keyword in sport_lower), None)
+        if activity_type:
+            return activity_type
     
     if pace:
         if pace < 8.0:  # Faster than 8 min/km is likely running
@@ -172,8 +469,10 @@ def analyze_workout(workout: Dict) -> Dict:
     elevation = workout.get('total_elevation_gain', 0)
     calories = workout.get('calories', 0)
     
-    # Use estimated max HR for zone calculations (workout max_hr is just the max in that workout)
-    estimated_max_hr = estimate_max_heart_rate()
+    # Use estimated max HR for zone calculations (workout max_hr is just the max in that workout),
+    # the same one time_in_zone was binned against
+    estimated_max_hr = workout.get('estimated_max_hr', DEFAULT_MAX_HR)
+    hr_percentage = (avg_hr / estimated_max_hr * 100) if avg_hr and estimated_max_hr > 0 else 0
     
     # Detect activity type
     activity_type = detect_activity_type(avg_pace, sport)
@@ -212,8 +511,7 @@ def analyze_workout(workout: Dict) -> Dict:
         analysis['highlights'].append(f"🏔️ {elevation:.0f}m elevation gain - great hill work!")
     
     if avg_hr:
-        hr_zone = get_heart_rate_zone(avg_hr, estimated_max_hr)
-        hr_percentage = (avg_hr / estimated_max_hr * 100) if estimated_max_hr > 0 else 0
+        hr_zone = HR_ZONE_NAMES[bisect_right(HR_ZONE_EDGES, hr_percentage)]
         
         if hr_percentage >= 80:
             analysis['highlights'].append(f"💪 High intensity effort - {hr_zone} (avg HR: {avg_hr} bpm)")
@@ -224,6 +522,12 @@ def analyze_workout(workout: Dict) -> Dict:
         else:
             analysis['highlights'].append(f"🧘 Easy recovery pace - {hr_zone} (avg HR: {avg_hr} bpm)")
     
+    time_in_zone = workout.get('time_in_zone')
+    if time_in_zone is not None and time_in_zone.sum() > 0:
+        main_zone = int(time_in_zone.argmax())
+        share = time_in_zone[main_zone] / time_in_zone.sum() * 100
+        analysis['highlights'].append(f"⏱️ Most time in {HR_ZONE_NAMES[main_zone]}: {time_in_zone[main_zone] / 60:.0f}m ({share:.0f}%)")
+    
     if calories > 500:
         analysis['highlights'].append(f"🔥 {calories} calories burned")
     
@@ -248,7 +552,6 @@ def analyze_workout(workout: Dict) -> Dict:
             analysis['suggestions'].append("🏃 Include flat runs to work on speed and efficiency")
         
         if avg_hr:
-            hr_percentage = (avg_hr / estimated_max_hr * 100) if estimated_max_hr > 0 else 0
             if hr_percentage >= 80:
                 analysis['suggestions'].append("🔄 Next workout: Easy recovery run at 60-70% max HR")
             elif hr_percentage < 70:
@@ -274,122 +577,184 @@ def analyze_workout(workout: Dict) -> Dict:
 
 def generate_strava_comment(workout: Dict, analysis: Dict) -> str:
     """Generate a Strava-style comment for the workout."""
-    comment_parts = []
+    buf = io.StringIO()
     
     # Main summary
-    comment_parts.append(f"📊 {analysis['summary']}")
-    comment_parts.append("")
+    buf.write(f"📊 {analysis['summary']}\n")
     
     # Highlights
     if analysis['highlights']:
-        comment_parts.append("🌟 Highlights:")
+        buf.write("\n🌟 Highlights:\n")
         for highlight in analysis['highlights']:
-            comment_parts.append(f"  {highlight}")
-        comment_parts.append("")
+            buf.write(f"  {highlight}\n")
     
     # Suggestions
     if analysis['suggestions']:
-        comment_parts.append("💡 Suggestions for next workouts:")
+        buf.write("\n💡 Suggestions for next workouts:")
         for suggestion in analysis['suggestions'][:3]:  # Limit to 3 suggestions
-            comment_parts.append(f"  {suggestion}")
+            buf.write(f"\n  {suggestion}")
     
-    return "\n".join(comment_parts)
+    return buf.getvalue()
 
 
-def analyze_all_workouts(data_dir: str) -> List[Dict]:
-    """Analyze all FIT files in the directory."""
-    fit_files = glob.glob(os.path.join(data_dir, "*.fit"))
-    fit_files.sort(key=os.path.getmtime, reverse=True)  # Most recent first
+def analyze_fit_file(fit_file: str, include_records: bool = True) -> Optional[Dict]:
+    """
+    Parse and analyze a single FIT file.
+    
+    Args:
+        fit_file: Path to the FIT file
+        include_records: Keep the record arrays in the returned workout; without
+            them the result stays small to send back from a worker process, and
+            load_workout_records() reads them from the parse cache on demand
+    """
+    workout = parse_fit_file(fit_file, include_records)
+    if not workout:
+        return None
     
-    print(f"Found {len(fit_files)} FIT files")
+    analysis = analyze_workout(workout)
+    return {
+        'workout': workout,
+        'analysis': analysis,
+        'comment': generate_strava_comment(workout, analysis)
+    }
+
+
+@dataclass(slots=True)
+class RunningStats:
+    """Training totals accumulated one workout at a time."""
+    workouts: int = 0
+    total_distance: float = 0.0  # km
+    total_time: float = 0.0  # minutes
+    hr_sum: float = 0.0
+    max_hr_sum: float = 0.0  # estimated max HR of the workouts counted in hr_sum
+    hr_count: int = 0
+    pace_sum: float = 0.0
+    pace_count: int = 0
+    
+    def update(self, workout: Dict) -> None:
+        """Add one parsed workout to the totals."""
+        self.workouts += 1
+        self.total_distance += workout.get('total_distance', 0) / 1000.0
+        self.total_time += workout.get('total_time', 0) / 60.0
+        avg_hr = workout.get('avg_heart_rate')
+        if avg_hr:
+            self.hr_sum += avg_hr
+            self.max_hr_sum += workout.get('estimated_max_hr', DEFAULT_MAX_HR)
+            self.hr_count += 1
+        avg_pace = workout.get('avg_pace')
+        if avg_pace:
+            self.pace_sum += avg_pace
+            self.pace_count += 1
+    
+    @property
+    def avg_heart_rate(self) -> Optional[float]:
+        """Mean of the workouts' average heart rates, or None without HR data."""
+        return self.hr_sum / self.hr_count if self.hr_count else None
+    
+    @property
+    def avg_estimated_max_hr(self) -> Optional[float]:
+        """Mean estimated max HR of the workouts with HR data, or None without any."""
+        return self.max_hr_sum / self.hr_count if self.hr_count else None
+    
+    @property
+    def avg_pace(self) -> Optional[float]:
+        """Mean of the workouts' average paces (min/km), or None without pace data."""
+        return self.pace_sum / self.pace_count if self.pace_count else None
+
+
+def analyze_all_workouts(data_dir: str, max_workers: Optional[int] = None,
+                         stats: Optional[RunningStats] = None) -> List[Dict]:
+    """
+    Analyze all FIT files in the directory, parsing them in parallel worker processes.
+    
+    Args:
+        data_dir: Directory containing FIT files
+        max_workers: Number of worker processes (default: CPU count)
+        stats: Totals updated with each analyzed workout, for
+            generate_training_recommendations
+    """
+    # Only the 20 most recent files are selected, so there's no need to sort
+    # the whole listing
+    fit_entries = []
+    if os.path.isdir(data_dir):
+        with os.scandir(data_dir) as entries:
+            fit_entries = [entry for entry in entries if entry.name.endswith('.fit') and not entry.name.startswith('.')]
+    
+    print(f"Found {len(fit_entries)} FIT files")
     print("=" * 80)
     
     all_workouts = []
-    
-    for fit_file in fit_files[:20]:  # Analyze last 20 workouts
-        print(f"\nAnalyzing: {os.path.basename(fit_file)}")
-        workout = parse_fit_file(fit_file)
-        
-        if workout:
-            analysis = analyze_workout(workout)
-            comment = generate_strava_comment(workout, analysis)
-            
-            workout_result = {
-                'workout': workout,
-                'analysis': analysis,
-                'comment': comment
-            }
-            all_workouts.append(workout_result)
+    recent_entries = heapq.nlargest(20, fit_entries, key=lambda entry: entry.stat().st_mtime)  # Most recent first
+    recent_files = [entry.path for entry in recent_entries]  # Analyze last 20 workouts
+    
+    # Files parse independently; map() returns results in file order, so
+    # printing from here keeps the output grouped per workout. Workers leave
+    # the record arrays out of their results
+    analyze = partial(analyze_fit_file, include_records=False)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for fit_file, workout_result in zip(recent_files, pool.map(analyze, recent_files, chunksize=4)):
+            print(f"\nAnalyzing: {os.path.basename(fit_file)}")
             
-            print(comment)
-            print("=" * 80)
+            if workout_result:
+                all_workouts.append(workout_result)
+                if stats is not None:
+                    stats.update(workout_result['workout'])
+                
+                print(workout_result['comment'])
+                print("=" * 80)
     
     return all_workouts
 
 
-def generate_training_recommendations(all_workouts: List[Dict]) -> str:
-    """Generate overall training recommendations based on all workouts."""
-    if not all_workouts:
+def generate_training_recommendations(all_workouts: List[Dict], stats: Optional[RunningStats] = None) -> str:
+    """
+    Generate overall training recommendations based on all workouts.
+    
+    Args:
+        all_workouts: Results of analyze_all_workouts
+        stats: Totals already accumulated over the workouts; computed from
+            all_workouts when omitted
+    """
+    if stats is None:
+        stats = RunningStats()
+        for w in all_workouts:
+            stats.update(w['workout'])
+    
+    if not stats.workouts:
         return "No workouts analyzed."
     
-    # Aggregate statistics
-    total_distance = sum(w['workout'].get('total_distance', 0) / 1000.0 for w in all_workouts)
-    total_time = sum(w['workout'].get('total_time', 0) / 60.0 for w in all_workouts)
-    avg_hrs = [w['workout'].get('avg_heart_rate') for w in all_workouts if w['workout'].get('avg_heart_rate')]
-    avg_paces = [w['workout'].get('avg_pace') for w in all_workouts if w['workout'].get('avg_pace')]
-    
-    recommendations = []
-    recommendations.append("🎯 OVERALL TRAINING RECOMMENDATIONS")
-    recommendations.append("=" * 80)
-    recommendations.append("")
-    
-    recommendations.append(f"📊 Recent Training Volume:")
-    recommendations.append(f"  • Total Distance: {total_distance:.2f} km")
-    recommendations.append(f"  • Total Time: {total_time/60:.1f} hours")
-    recommendations.append(f"  • Workouts Analyzed: {len(all_workouts)}")
-    recommendations.append("")
-    
-    if avg_hrs:
-        avg_hr = sum(avg_hrs) / len(avg_hrs)
-        estimated_max_hr = estimate_max_heart_rate()
-        hr_percentage = (avg_hr / estimated_max_hr * 100) if estimated_max_hr > 0 else 0
-        recommendations.append(f"💓 Average Heart Rate: {avg_hr:.0f} bpm ({hr_percentage:.0f}% of estimated max)")
-        recommendations.append("")
-    
-    if avg_paces:
-        avg_pace = sum(avg_paces) / len(avg_paces)
+    avg_hr = stats.avg_heart_rate
+    avg_pace = stats.avg_pace
+    
+    buf = io.StringIO()
+    buf.write(RECOMMENDATIONS_HEADER)
+    
+    buf.write("📊 Recent Training Volume:\n")
+    buf.write(f"  • Total Distance: {stats.total_distance:.2f} km\n")
+    buf.write(f"  • Total Time: {stats.total_time/60:.1f} hours\n")
+    buf.write(f"  • Workouts Analyzed: {stats.workouts}\n\n")
+    
+    if avg_hr is not None:
+        # Against the same max HR the per-workout zone highlights use
+        hr_percentage = avg_hr / stats.avg_estimated_max_hr * 100
+        buf.write(f"💓 Average Heart Rate: {avg_hr:.0f} bpm ({hr_percentage:.0f}% of estimated max)\n\n")
+    
+    if avg_pace is not None:
         pace_min = int(avg_pace)
         pace_sec = int((avg_pace - pace_min) * 60)
-        recommendations.append(f"⚡ Average Pace: {pace_min}:{pace_sec:02d}/km")
-        recommendations.append("")
+        buf.write(f"⚡ Average Pace: {pace_min}:{pace_sec:02d}/km\n\n")
     
-    recommendations.append("💡 Training Suggestions:")
-    recommendations.append("")
+    buf.write("💡 Training Suggestions:\n\n")
     
     # Analyze training patterns
-    if avg_paces:
-        avg_pace = sum(avg_paces) / len(avg_paces)
+    if avg_pace is not None:
         if avg_pace < 5.0:
-            recommendations.append("  ⚠️  Your recent workouts have been very intense!")
-            recommendations.append("     → Add more easy/recovery runs (60-70% max HR)")
-            recommendations.append("     → Follow the 80/20 rule: 80% easy, 20% hard")
+            buf.write(INTENSE_TRAINING_ADVICE)
         elif avg_pace > 6.0:
-            recommendations.append("  🎯 Great base building! Time to add some intensity:")
-            recommendations.append("     → Include 1-2 interval sessions per week")
-            recommendations.append("     → Add tempo runs (comfortably hard pace)")
+            buf.write(BASE_BUILDING_ADVICE)
     
-    recommendations.append("")
-    recommendations.append("📅 Weekly Training Plan Suggestion:")
-    recommendations.append("  • Monday: Easy run (60-70% max HR)")
-    recommendations.append("  • Wednesday: Interval or tempo run")
-    recommendations.append("  • Friday: Easy run or rest")
-    recommendations.append("  • Sunday: Long run (70-80% max HR)")
-    recommendations.append("")
-    recommendations.append("💪 Remember: Consistency > Intensity")
-    recommendations.append("   Recovery is just as important as training!")
-    
-    return "\n".join(recommendations)
-
+    buf.write(WEEKLY_PLAN)
+    return buf.getvalue()
 
 if __name__ == "__main__":
     data_dir = "/Users/hongtang/Documents/coros_fit/corosfitdata"
@@ -397,11 +762,12 @@ if __name__ == "__main__":
     print("🏃 Analyzing Coros Workout Data")
     print("=" * 80)
     
-    all_workouts = analyze_all_workouts(data_dir)
+    stats = RunningStats()
+    all_workouts = analyze_all_workouts(data_dir, stats=stats)
     
     if all_workouts:
         print("\n\n")
-        recommendations = generate_training_recommendations(all_workouts)
+        recommendations = generate_training_recommendations(all_workouts, stats)
         print(recommendations)
         
         # Save results to file
@@ -6,19 +6,201 @@ Convert Coros FIT files to CSV format for analysis.
 import os
 import glob
 import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from datetime import datetime
 from fitparse import FitFile
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import pandas as pd
 
+try:
+    import fitdecode
+    FITDECODE_AVAILABLE = True
+except ImportError:
+    FITDECODE_AVAILABLE = False
 
-def parse_fit_to_csv(fit_file_path: str, output_dir: str) -> Optional[str]:
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# FIT message types written to the CSVs; the rest are skipped
+FIT_MESSAGES = ('record', 'session', 'file_id', 'lap')
+
+
+class _DiscardedMessages(list):
+    """Message list that drops everything appended to it."""
+    
+    def append(self, message) -> None:
+        pass
+
+
+class StreamingFitFile(FitFile):
+    """
+    FitFile that yields messages without caching them.
+    
+    fitparse keeps every parsed message in memory so get_messages() can be
+    called repeatedly; a file read once from start to end doesn't need that.
+    Only a single get_messages() pass is possible.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._messages = _DiscardedMessages()
+
+
+if FITDECODE_AVAILABLE:
+    class _NaiveUTCDataProcessor(fitdecode.DefaultDataProcessor):
+        """fitdecode processor returning naive UTC datetimes, as fitparse does."""
+        
+        def process_type_date_time(self, reader, field_data):
+            super().process_type_date_time(reader, field_data)
+            if isinstance(field_data.value, datetime):
+                field_data.value = field_data.value.replace(tzinfo=None)
+
+
+def _fitdecode_messages(reader, frames: Iterator, names: frozenset) -> Iterator[Tuple[str, Dict]]:
+    """Yield the data messages named in names from an open fitdecode reader."""
+    with reader:
+        for frame in frames:
+            if frame.frame_type == fitdecode.FIT_FRAME_DATA and frame.name in names:
+                yield frame.name, {field.name: field.value for field in frame.fields}
+
+
+def open_fit_messages(fit_file_path: str, names: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Open a FIT file and iterate over its data messages of the given types.
+    
+    Messages are decoded with fitdecode when it is installed, falling back to
+    fitparse. Either way the file header is read before returning, so an
+    unreadable file raises here rather than during iteration.
+    
+    Args:
+        fit_file_path: Path to the FIT file
+        names: Message types to yield (e.g. 'record', 'session')
+        
+    Returns:
+        Iterator of (message name, {field name: value}) pairs, with fields in
+        FIT definition order and timestamps as naive UTC datetimes
+    """
+    # fitparse only treats a tuple or list as several message names; any other
+    # iterable (a set included) would be looked up as a single name.
+    names = tuple(names)
+    if FITDECODE_AVAILABLE:
+        reader = fitdecode.FitReader(fit_file_path, processor=_NaiveUTCDataProcessor(),
+                                     check_crc=fitdecode.CrcCheck.RAISE)
+        frames = iter(reader)
+        try:
+            next(frames)  # the file header
+        except BaseException:
+            reader.close()
+            raise
+        return _fitdecode_messages(reader, frames, frozenset(names))
+    
+    fitfile = StreamingFitFile(fit_file_path)
+    return ((message.name, message.get_values()) for message in fitfile.get_messages(names))
+
+
+def _field_sort_key(name) -> tuple:
+    """
+    Order message fields the way iterating a fitparse message does: known
+    fields by name, then the unknown_<n> fields.
+    
+    open_fit_messages() returns fields in FIT definition order instead.
+    """
+    name = str(name)
+    return name.startswith('unknown_'), name
+
+
+def metadata_path(csv_file_path: str) -> str:
+    """Path of the metadata sidecar written next to a converted CSV."""
+    return os.path.splitext(csv_file_path)[0] + '.meta.json'
+
+
+def write_metadata(csv_file_path: str, session_data: Dict, file_id_data: Dict,
+                   record_columns: List[str], start_time, total_records: int) -> None:
+    """
+    Write the session and file_id metadata of a converted FIT file to its sidecar.
+    
+    Args:
+        csv_file_path: Path of the converted CSV
+        session_data: Session message fields
+        file_id_data: file_id message fields
+        record_columns: Record fields present as CSV columns
+        start_time: Timestamp of the first record, if records have one
+        total_records: Number of data rows in the CSV
+    """
+    metadata = {
+        'session': session_data,
+        'file_id': file_id_data,
+        'columns': record_columns,
+        'start_time': start_time,
+        'total_records': total_records,
+    }
+    with open(metadata_path(csv_file_path), 'w') as f:
+        json.dump(metadata, f, default=str)
+
+
+def _to_csv_text(column):
+    """Format a float or bool Arrow column the way DataFrame.to_csv writes it."""
+    if pa.types.is_boolean(column.type):
+        return pc.if_else(column, 'True', 'False')
+    text = pc.cast(column, pa.string())
+    # Arrow drops the '.0' of integral floats, which would then read back as ints
+    integral = pc.match_substring_regex(text, r'^-?\d+$')
+    return pc.if_else(integral, pc.binary_join_element_wise(text, '.0', ''), text)
+
+
+def write_csv(df: pd.DataFrame, csv_file_path: str) -> None:
+    """
+    Write a DataFrame to CSV with pyarrow's C++ writer, or pandas without pyarrow.
+    
+    The output reads back with the same dtypes as DataFrame.to_csv's: floats
+    keep their decimal point, booleans are written as True/False, and only
+    cells that need it are quoted. Timestamps are written at second
+    resolution, as FIT records them. Frames Arrow can't type (e.g. columns
+    mixing values of different types), or a pyarrow too old to skip quoting,
+    fall back to DataFrame.to_csv.
+    """
+    if PYARROW_AVAILABLE:
+        try:
+            write_options = pa_csv.WriteOptions(include_header=False, quoting_style='needed')
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            for i, field in enumerate(table.schema):
+                if pa.types.is_timestamp(field.type) and field.type.unit != 's':
+                    table = table.set_column(i, field.name, table.column(i).cast(pa.timestamp('s', field.type.tz)))
+                elif pa.types.is_floating(field.type) or pa.types.is_boolean(field.type):
+                    table = table.set_column(i, field.name, _to_csv_text(table.column(i)))
+            # Arrow quotes every header name, so the header is written here
+            header = io.StringIO()
+            csv.writer(header, lineterminator='\n').writerow(table.column_names)
+            with open(csv_file_path, 'wb') as f:
+                f.write(header.getvalue().encode('utf-8'))
+                pa_csv.write_csv(table, f, write_options=write_options)
+            return
+        except (TypeError, pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+    df.to_csv(csv_file_path, index=False)
+
+
+def parse_fit_to_csv(fit_file_path: str, output_dir: str, embed_metadata: bool = True) -> Optional[str]:
     """
     Parse a FIT file and convert it to CSV format.
     
+    Session and file_id metadata of record files are also written to a
+    ``.meta.json`` sidecar next to the CSV.
+    
     Args:
         fit_file_path: Path to the input FIT file
         output_dir: Directory to save the CSV file
+        embed_metadata: Also repeat the metadata on every CSV row as session_*/file_*
+            columns (read by the other analysis scripts); False keeps the CSV record-only
         
     Returns:
         Path to the created CSV file, or None if parsing failed
@@ -26,7 +208,7 @@ def parse_fit_to_csv(fit_file_path: str, output_dir: str) -> Optional[str]:
     try:
         # Try to open and parse the FIT file
         try:
-            fitfile = FitFile(fit_file_path)
+            messages = open_fit_messages(fit_file_path, FIT_MESSAGES)
         except Exception as e:
             # Skip files that can't be opened
             print(f"⚠ Skipped {os.path.basename(fit_file_path)}: Cannot open file - {str(e)[:50]}")
@@ -34,58 +216,73 @@ def parse_fit_to_csv(fit_file_path: str, output_dir: str) -> Optional[str]:
         base_name = os.path.splitext(os.path.basename(fit_file_path))[0]
         csv_file_path = os.path.join(output_dir, f"{base_name}.csv")
         
-        # Lists to store data
-        records = []
+        # Record data is accumulated column-wise: one list per field, padded
+        # with None where a record lacks the field
+        record_columns = {}
+        column_order = []  # record fields in order of first appearance
+        n_records = 0
         session_data = {}
         file_id_data = {}
         
-        # Parse file_id messages
-        for record in fitfile.get_messages('file_id'):
-            for field in record:
-                file_id_data[field.name] = field.value
-        
-        # Parse session data (summary)
-        for record in fitfile.get_messages('session'):
-            for field in record:
-                session_data[field.name] = field.value
+        laps = []
+        new_columns = []
         
-        # Parse record data (detailed track points)
-        for record in fitfile.get_messages('record'):
-            record_dict = {}
-            for field in record:
-                record_dict[field.name] = field.value
-            if record_dict:
-                records.append(record_dict)
+        # Read the file in a single pass, dispatching on the message type
+        for name, values in messages:
+            if name == 'record':
+                # Detailed track points
+                if values:
+                    for key, value in values.items():
+                        column = record_columns.get(key)
+                        if column is None:
+                            column = record_columns[key] = [None] * n_records
+                            new_columns.append(key)
+                        column.append(value)
+                    if new_columns:
+                        column_order.extend(sorted(new_columns, key=_field_sort_key))
+                        new_columns.clear()
+                    n_records += 1
+                    if len(values) < len(record_columns):
+                        for column in record_columns.values():
+                            if len(column) < n_records:
+                                column.append(None)
+            
+            elif name == 'session':
+                # Session data (summary)
+                session_data.update(sorted(values.items(), key=lambda item: _field_sort_key(item[0])))
+            
+            elif name == 'file_id':
+                file_id_data.update(sorted(values.items(), key=lambda item: _field_sort_key(item[0])))
+            
+            elif name == 'lap':
+                if values:
+                    laps.append(values)
         
-        # Parse lap data if available
-        laps = []
-        for record in fitfile.get_messages('lap'):
-            lap_dict = {}
-            for field in record:
-                lap_dict[field.name] = field.value
-            if lap_dict:
-                laps.append(lap_dict)
+        record_columns = {key: record_columns[key] for key in column_order}
         
         # If we have record data, save it as the main CSV
-        if records:
-            # Convert records to DataFrame for easier handling
-            df_records = pd.DataFrame(records)
+        if n_records:
+            columns = dict(record_columns)
             
-            # Add session summary as metadata columns (repeat for each record)
-            if session_data:
+            if embed_metadata:
+                # Add session summary as metadata columns (scalars broadcast to every record)
                 for key, value in session_data.items():
-                    if key not in df_records.columns:
-                        df_records[f'session_{key}'] = value
-            
-            # Add file_id metadata
-            if file_id_data:
+                    if key not in columns:
+                        columns[f'session_{key}'] = value
+                
+                # Add file_id metadata
                 for key, value in file_id_data.items():
-                    if key not in df_records.columns:
-                        df_records[f'file_{key}'] = value
+                    if key not in columns:
+                        columns[f'file_{key}'] = value
+            
+            # Build the DataFrame straight from the columns
+            df_records = pd.DataFrame(columns)
             
             # Save to CSV
-            df_records.to_csv(csv_file_path, index=False)
-            print(f"✓ Converted {os.path.basename(fit_file_path)} -> {os.path.basename(csv_file_path)} ({len(records)} records)")
+            write_csv(df_records, csv_file_path)
+            start_time = record_columns['timestamp'][0] if 'timestamp' in record_columns else None
+            write_metadata(csv_file_path, session_data, file_id_data, list(record_columns), start_time, n_records)
+            print(f"✓ Converted {os.path.basename(fit_file_path)} -> {os.path.basename(csv_file_path)} ({n_records} records)")
             return csv_file_path
         
         # If no records but we have session data, create a summary CSV
@@ -97,7 +294,7 @@ def parse_fit_to_csv(fit_file_path: str, output_dir: str) -> Optional[str]:
                 for key, value in file_id_data.items():
                     df_session[f'file_{key}'] = value
             
-            df_session.to_csv(csv_file_path, index=False)
+            write_csv(df_session, csv_file_path)
             print(f"✓ Converted {os.path.basename(fit_file_path)} -> {os.path.basename(csv_file_path)} (session summary only)")
             return csv_file_path
         
@@ -110,13 +307,18 @@ def parse_fit_to_csv(fit_file_path: str, output_dir: str) -> Optional[str]:
         return None
 
 
-def convert_all_fit_files(input_dir: str, output_dir: str) -> Dict[str, int]:
+def convert_all_fit_files(input_dir: str, output_dir: str, max_workers: Optional[int] = None,
+                          embed_metadata: bool = True) -> Dict[str, int]:
     """
     Convert all FIT files in a directory to CSV format.
     
+    Files are converted in parallel worker processes.
+    
     Args:
         input_dir: Directory containing FIT files
         output_dir: Directory to save CSV files
+        max_workers: Number of worker processes (default: CPU count)
+        embed_metadata: Repeat session/file_id metadata on every CSV row (see parse_fit_to_csv)
         
     Returns:
         Dictionary with conversion statistics
@@ -139,13 +341,14 @@ def convert_all_fit_files(input_dir: str, output_dir: str) -> Dict[str, int]:
         'skipped': 0
     }
     
-    # Convert each file
-    for fit_file in fit_files:
-        result = parse_fit_to_csv(fit_file, output_dir)
-        if result:
-            stats['successful'] += 1
-        else:
-            stats['failed'] += 1
+    # Convert each file; workers print their own progress lines
+    convert = partial(parse_fit_to_csv, output_dir=output_dir, embed_metadata=embed_metadata)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for result in pool.map(convert, fit_files, chunksize=8):
+            if result:
+                stats['successful'] += 1
+            else:
+                stats['failed'] += 1
     
     return stats
 
@@ -154,6 +357,10 @@ def create_summary_csv(output_dir: str) -> None:
     """
     Create a summary CSV file listing all converted workouts.
     
+    Metadata and record counts come from each CSV's ``.meta.json`` sidecar
+    when present, so only CSVs converted without one are opened: for their
+    first row and a line count.
+    
     Args:
         output_dir: Directory containing CSV files
     """
@@ -167,26 +374,43 @@ def create_summary_csv(output_dir: str) -> None:
     
     for csv_file in csv_files:
         try:
-            df = pd.read_csv(csv_file, nrows=1)  # Read just the header and first row
-            
             summary = {
                 'filename': os.path.basename(csv_file),
                 'file_id': csv_file,
             }
             
-            # Extract key metrics if available
-            if 'timestamp' in df.columns:
-                summary['timestamp'] = df['timestamp'].iloc[0] if len(df) > 0 else None
-            
-            # Session data
-            session_cols = [col for col in df.columns if col.startswith('session_')]
-            for col in session_cols:
-                key = col.replace('session_', '')
-                summary[key] = df[col].iloc[0] if len(df) > 0 else None
+            metadata = None
+            if os.path.exists(metadata_path(csv_file)):
+                with open(metadata_path(csv_file)) as f:
+                    metadata = json.load(f)
             
-            # Count total records
-            df_full = pd.read_csv(csv_file)
-            summary['total_records'] = len(df_full)
+            if metadata is not None:
+                record_columns = set(metadata['columns'])
+                if 'timestamp' in record_columns:
+                    summary['timestamp'] = metadata['start_time']
+                
+                # Session fields that don't clash with a record column
+                for key, value in metadata['session'].items():
+                    if key not in record_columns:
+                        summary[key] = value
+                
+                summary['total_records'] = metadata['total_records']
+            else:
+                df = pd.read_csv(csv_file, nrows=1)  # Read just the header and first row
+                
+                # Extract key metrics if available
+                if 'timestamp' in df.columns:
+                    summary['timestamp'] = df['timestamp'].iloc[0] if len(df) > 0 else None
+                
+                # Session data
+                session_cols = [col for col in df.columns if col.startswith('session_')]
+                for col in session_cols:
+                    key = col.replace('session_', '')
+                    summary[key] = df[col].iloc[0] if len(df) > 0 else None
+                
+                # Count total records (every line after the header)
+                with open(csv_file, 'rb') as f:
+                    summary['total_records'] = sum(1 for _ in f) - 1
             
             summary_data.append(summary)
             
@@ -194,7 +418,7 @@ def create_summary_csv(output_dir: str) -> None:
             print(f"Error reading {csv_file}: {e}")
     
     if summary_data:
-        df_summary = pd.DataFrame(summary_data)
+        df_summary = pd.DataFrame.from_records(summary_data)
         summary_file = os.path.join(output_dir, "_summary.csv")
         df_summary.to_csv(summary_file, index=False)
         print(f"\n✓ Created summary file: {summary_file}")
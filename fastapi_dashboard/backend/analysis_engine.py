@@ -2,9 +2,27 @@
 Analysis engine for swimming workouts - extracted from dashboard generator.
 """
 
+import copy
+import hashlib
+import math
+import threading
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 
 def load_swim_data(df: pd.DataFrame) -> Dict:
@@ -14,24 +32,174 @@ def load_swim_data(df: pd.DataFrame) -> Dict:
     if len(df) == 0:
         return metadata
     
-    if 'session_start_time' in df.columns:
-        metadata['date'] = df['session_start_time'].iloc[0]
-    if 'session_total_distance' in df.columns:
-        distance_m = df['session_total_distance'].iloc[0]
+    # Session values sit in the first row; take it once rather than one
+    # column lookup per field
+    row0 = df.iloc[0]
+    if 'session_start_time' in row0:
+        metadata['date'] = row0['session_start_time']
+    if 'session_total_distance' in row0:
+        distance_m = row0['session_total_distance']
         metadata['distance_m'] = distance_m
         metadata['distance_km'] = distance_m / 1000.0
-    if 'session_total_elapsed_time' in df.columns:
-        metadata['total_time_sec'] = df['session_total_elapsed_time'].iloc[0]
-    if 'session_pool_length' in df.columns:
-        metadata['pool_length'] = df['session_pool_length'].iloc[0]
-    if 'session_avg_cadence' in df.columns:
-        metadata['avg_stroke_rate'] = df['session_avg_cadence'].iloc[0]
-    if 'session_avg_speed' in df.columns:
-        metadata['avg_speed_ms'] = df['session_avg_speed'].iloc[0]
+    if 'session_total_elapsed_time' in row0:
+        metadata['total_time_sec'] = row0['session_total_elapsed_time']
+    if 'session_pool_length' in row0:
+        metadata['pool_length'] = row0['session_pool_length']
+    if 'session_avg_cadence' in row0:
+        metadata['avg_stroke_rate'] = row0['session_avg_cadence']
+    if 'session_avg_speed' in row0:
+        metadata['avg_speed_ms'] = row0['session_avg_speed']
     
     return metadata
 
 
+# Fast swimming: samples at 115%+ of the average speed; a run of at least
+# FAST_SEGMENT_MIN_SAMPLES of them counts as a speed gear
+FAST_SPEED_RATIO = 1.15
+FAST_SEGMENT_MIN_SAMPLES = 20
+# Stops: samples below 10% of the average speed
+STOP_SPEED_RATIO = 0.1
+# Speed/stroke/efficiency sample arrays: single precision is plenty for watch
+# data and halves the bytes every reduction (and the JSON payload) has to move
+SAMPLE_DTYPE = np.float32
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _speed_kernel(speed):
+        """Mean, sample std, stop count and fast-run count of the speed samples."""
+        n = speed.size
+        total = 0.0
+        for i in range(n):
+            total += speed[i]
+        mean = total / n
+        
+        stop_threshold = mean * STOP_SPEED_RATIO
+        fast_threshold = mean * FAST_SPEED_RATIO
+        sum_sq = 0.0
+        stops = 0
+        fast_runs = 0
+        run_length = 0
+        for i in range(n):
+            x = speed[i]
+            d = x - mean
+            sum_sq += d * d
+            if x < stop_threshold:
+                stops += 1
+            if x >= fast_threshold:
+                run_length += 1
+            else:
+                if run_length >= FAST_SEGMENT_MIN_SAMPLES:
+                    fast_runs += 1
+                run_length = 0
+        if run_length >= FAST_SEGMENT_MIN_SAMPLES:
+            fast_runs += 1
+        
+        std = np.sqrt(sum_sq / (n - 1)) if n > 1 else np.nan
+        return mean, std, stops, fast_runs
+    
+    @njit(cache=True)
+    def _stroke_kernel(stroke):
+        """Mean, sample std, and first/last fifth means of the stroke rate samples."""
+        n = stroke.size
+        head = n // 5
+        tail_start = n + (-n // 5)
+        total = 0.0
+        head_sum = 0.0
+        tail_sum = 0.0
+        for i in range(n):
+            x = stroke[i]
+            total += x
+            if i < head:
+                head_sum += x
+            if i >= tail_start:
+                tail_sum += x
+        mean = total / n
+        
+        sum_sq = 0.0
+        for i in range(n):
+            d = stroke[i] - mean
+            sum_sq += d * d
+        std = np.sqrt(sum_sq / (n - 1)) if n > 1 else np.nan
+        first_avg = head_sum / head if head > 0 else np.nan
+        last_avg = tail_sum / (n - tail_start) if n > tail_start else np.nan
+        return mean, std, first_avg, last_avg
+
+
+def _mean_std(values: np.ndarray) -> Tuple[float, float]:
+    """
+    Mean and sample standard deviation (ddof=1, as pandas) of a non-empty array.
+    
+    The deviations reuse the mean instead of letting std() recompute it; the
+    std is NaN for a single sample. Sums accumulate in float64 whatever the
+    sample dtype.
+    """
+    mean = values.mean(dtype=np.float64)
+    if values.size < 2:
+        return mean, np.nan
+    deviations = values - mean
+    return mean, np.sqrt(np.dot(deviations, deviations) / (values.size - 1))
+
+
+def _speed_stats(speed: np.ndarray) -> Tuple[float, float, int, int]:
+    """
+    Summarise the (non-empty) speed samples.
+    
+    Uses the compiled kernel when numba is installed.
+    
+    Returns:
+        Tuple of mean, sample std, number of stop samples and number of fast
+        runs of FAST_SEGMENT_MIN_SAMPLES or more samples
+    """
+    if NUMBA_AVAILABLE:
+        # NumPy scalars, like the fallback, so a NaN std serializes the same way
+        mean, std, stops, fast_runs = _speed_kernel(speed)
+        return np.float64(mean), np.float64(std), int(stops), int(fast_runs)
+    
+    mean, std = _mean_std(speed)
+    stops = int(np.count_nonzero(speed < mean * STOP_SPEED_RATIO))
+    
+    # Runs of fast samples start where the mask steps 0 -> 1 and end where
+    # it steps 1 -> 0
+    fast = speed >= mean * FAST_SPEED_RATIO
+    edges = np.diff(fast.astype(np.int8), prepend=0, append=0)
+    run_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    fast_runs = int(np.count_nonzero(run_lengths >= FAST_SEGMENT_MIN_SAMPLES))
+    return mean, std, stops, fast_runs
+
+
+def _stroke_stats(stroke: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    Summarise the (non-empty) stroke rate samples.
+    
+    Uses the compiled kernel when numba is installed.
+    
+    Returns:
+        Tuple of mean, sample std, and the means of the first and last fifth
+        of the samples (NaN when a fifth is empty)
+    """
+    if NUMBA_AVAILABLE:
+        return tuple(np.float64(x) for x in _stroke_kernel(stroke))
+    
+    mean, std = _mean_std(stroke)
+    fifth_head = stroke[:len(stroke)//5]
+    fifth_tail = stroke[-len(stroke)//5:]
+    first_avg = fifth_head.mean(dtype=np.float64) if fifth_head.size else np.nan
+    last_avg = fifth_tail.mean(dtype=np.float64) if fifth_tail.size else np.nan
+    return mean, std, first_avg, last_avg
+
+
+def _valid_samples(column: pd.Series, upper: float = np.inf) -> np.ndarray:
+    """
+    Samples strictly between 0 and upper, as a SAMPLE_DTYPE array.
+    
+    NaN and infinities fail the range check, so one fused mask does both the
+    gap filtering and the range filtering.
+    """
+    values = column.to_numpy(dtype=SAMPLE_DTYPE, copy=False)
+    return values[(values > 0) & (values < upper)]
+
+
 def calculate_swim_metrics(df: pd.DataFrame) -> Dict:
     """Calculate all swimming-specific metrics for scoring."""
     metrics = {}
@@ -44,72 +212,43 @@ def calculate_swim_metrics(df: pd.DataFrame) -> Dict:
             break
     
     if speed_col:
-        speed_data = df[speed_col].dropna()
-        speed_data = speed_data[speed_data > 0]  # Filter zeros (stops)
-        if len(speed_data) > 0:
-            metrics['speed'] = speed_data.values
-            metrics['speed_avg'] = speed_data.mean()
-            metrics['speed_std'] = speed_data.std()
-            metrics['speed_cv'] = (speed_data.std() / speed_data.mean() * 100) if speed_data.mean() > 0 else 0
+        speed_arr = _valid_samples(df[speed_col])  # Drop gaps and zeros (stops)
+        if len(speed_arr) > 0:
+            speed_avg, speed_std, stops, fast_segment_count = _speed_stats(speed_arr)
+            metrics['speed'] = speed_arr
+            metrics['speed_avg'] = speed_avg
+            metrics['speed_std'] = speed_std
+            metrics['speed_cv'] = (speed_std / speed_avg * 100) if speed_avg > 0 else 0
             
             # Detect stops (speed near zero)
-            stop_threshold = speed_data.mean() * 0.1
-            stops = (speed_data < stop_threshold).sum()
             metrics['num_stops'] = stops
-            metrics['stop_percentage'] = (stops / len(speed_data) * 100) if len(speed_data) > 0 else 0
+            metrics['stop_percentage'] = stops / len(speed_arr) * 100
+            
+            # Detect speed gears (fast segments)
+            if len(speed_arr) > 50:
+                metrics['speed_gear_count'] = fast_segment_count
+                metrics['has_speed_gears'] = fast_segment_count > 0
         else:
-            metrics['speed'] = np.array([])
+            metrics['speed'] = np.array([], dtype=SAMPLE_DTYPE)
             metrics['speed_avg'] = 0
             metrics['speed_cv'] = 100
             metrics['stop_percentage'] = 100
     
     # Get stroke rate (cadence)
     if 'cadence' in df.columns:
-        stroke_rate = df['cadence'].dropna()
-        stroke_rate = stroke_rate[(stroke_rate > 0) & (stroke_rate < 100)]  # Reasonable range
-        metrics['stroke_rate'] = stroke_rate.values
-        if len(stroke_rate) > 0:
-            metrics['stroke_rate_avg'] = stroke_rate.mean()
-            metrics['stroke_rate_std'] = stroke_rate.std()
-            metrics['stroke_rate_cv'] = (stroke_rate.std() / stroke_rate.mean() * 100) if stroke_rate.mean() > 0 else 0
+        stroke_arr = _valid_samples(df['cadence'], upper=100)  # Reasonable range
+        metrics['stroke_rate'] = stroke_arr
+        if len(stroke_arr) > 0:
+            stroke_rate_avg, stroke_rate_std, first_20, last_20 = _stroke_stats(stroke_arr)
+            metrics['stroke_rate_avg'] = stroke_rate_avg
+            metrics['stroke_rate_std'] = stroke_rate_std
+            metrics['stroke_rate_cv'] = (stroke_rate_std / stroke_rate_avg * 100) if stroke_rate_avg > 0 else 0
             
             # Late stroke rate drop (last 20% vs first 20%)
-            if len(stroke_rate) > 20:
-                first_20 = stroke_rate.iloc[:len(stroke_rate)//5].mean()
-                last_20 = stroke_rate.iloc[-len(stroke_rate)//5:].mean()
+            if len(stroke_arr) > 20:
                 metrics['stroke_rate_drop'] = first_20 - last_20
                 metrics['stroke_rate_drop_pct'] = ((first_20 - last_20) / first_20 * 100) if first_20 > 0 else 0
     
-    # Detect speed gears (fast segments)
-    if 'speed' in metrics and len(metrics['speed']) > 50:
-        speed_arr = metrics['speed']
-        avg_speed = np.mean(speed_arr)
-        fast_threshold = avg_speed * 1.15
-        fast_segments = speed_arr >= fast_threshold
-        
-        in_fast_segment = False
-        fast_segment_count = 0
-        fast_segment_length = 0
-        
-        for is_fast in fast_segments:
-            if is_fast:
-                if not in_fast_segment:
-                    in_fast_segment = True
-                    fast_segment_length = 1
-                else:
-                    fast_segment_length += 1
-            else:
-                if in_fast_segment and fast_segment_length >= 20:
-                    fast_segment_count += 1
-                in_fast_segment = False
-                fast_segment_length = 0
-        
-        if in_fast_segment and fast_segment_length >= 20:
-            fast_segment_count += 1
-        
-        metrics['speed_gear_count'] = fast_segment_count
-        metrics['has_speed_gears'] = fast_segment_count > 0
-    
     # Calculate efficiency (speed per stroke rate - higher is better)
     if 'speed' in metrics and 'stroke_rate' in metrics:
         speed_arr = metrics['speed']
@@ -120,14 +259,18 @@ def calculate_swim_metrics(df: pd.DataFrame) -> Dict:
             speed_aligned = speed_arr[:min_len]
             stroke_aligned = stroke_arr[:min_len]
             valid_mask = (speed_aligned > 0) & (stroke_aligned > 0)
-            speed_valid = speed_aligned[valid_mask]
-            stroke_valid = stroke_aligned[valid_mask]
+            efficiency = np.divide(speed_aligned, stroke_aligned,
+                                   out=np.zeros(min_len, dtype=SAMPLE_DTYPE), where=valid_mask)
+            speed_valid, stroke_valid = speed_aligned, stroke_aligned
+            if not valid_mask.all():
+                efficiency = efficiency[valid_mask]
+                speed_valid = speed_aligned[valid_mask]
+                stroke_valid = stroke_aligned[valid_mask]
             
-            if len(speed_valid) > 0:
-                efficiency = speed_valid / stroke_valid
+            if len(efficiency) > 0:
                 metrics['efficiency'] = efficiency
-                metrics['efficiency_avg'] = np.mean(efficiency)
-                metrics['efficiency_std'] = np.std(efficiency)
+                metrics['efficiency_avg'] = efficiency.mean(dtype=np.float64)
+                metrics['efficiency_std'] = efficiency.std(dtype=np.float64)
                 metrics['efficiency_data'] = efficiency
                 metrics['speed_for_efficiency'] = speed_valid
                 metrics['stroke_rate_for_efficiency'] = stroke_valid
@@ -135,74 +278,97 @@ def calculate_swim_metrics(df: pd.DataFrame) -> Dict:
     return metrics
 
 
+# Workout type decision table. Each feature is binned with bisect_right, so
+# an edge belongs to the bin above it; the "greater than" thresholds use the
+# next float up as their edge to keep them strict.
+SPEED_CV_EDGES = (8, 10, np.nextafter(15, np.inf))  # <8, <10, <=15, >15
+AVG_SPEED_EDGES = (0.6, np.nextafter(0.8, np.inf))  # <0.6, <=0.8, >0.8
+STOP_PCT_EDGES = (10, 15, np.nextafter(20, np.inf))  # <10, <15, <=20, >20
+SPEED_GEAR_MIN = 3  # Speed sets need >3 gears
+
+
+def _workout_type_for_bins(cv_bin: int, speed_bin: int, stop_bin: int, many_gears: bool) -> str:
+    """Workout type rules expressed on the binned features."""
+    if cv_bin == 3 and many_gears:
+        return "Speed"
+    if speed_bin == 2 and cv_bin <= 1 and stop_bin == 0:
+        return "Threshold"
+    if stop_bin == 3:
+        return "Technique"
+    if cv_bin == 0 and stop_bin <= 1:
+        return "Endurance"
+    if speed_bin == 0:
+        return "Recovery"
+    return "Endurance"
+
+
+WORKOUT_TYPE_TABLE = tuple(
+    _workout_type_for_bins(cv_bin, speed_bin, stop_bin, many_gears)
+    for cv_bin in range(len(SPEED_CV_EDGES) + 1)
+    for speed_bin in range(len(AVG_SPEED_EDGES) + 1)
+    for stop_bin in range(len(STOP_PCT_EDGES) + 1)
+    for many_gears in (False, True)
+)
+
+
 def detect_workout_type(df: pd.DataFrame, metrics: Dict) -> str:
     """Detect workout type: Endurance / Threshold / Speed / Recovery / Technique"""
     if 'speed' not in metrics or len(metrics.get('speed', [])) < 50:
         return "Recovery"
     
-    speed_cv = metrics.get('speed_cv', 0)
-    avg_speed = metrics.get('speed_avg', 0)
-    
-    if speed_cv > 15 and metrics.get('speed_gear_count', 0) > 3:
-        return "Speed"
+    # With 50+ speed samples calculate_swim_metrics has set all of these
+    cv_bin = bisect_right(SPEED_CV_EDGES, metrics.get('speed_cv', 0))
+    speed_bin = bisect_right(AVG_SPEED_EDGES, metrics.get('speed_avg', 0))
+    stop_bin = bisect_right(STOP_PCT_EDGES, metrics.get('stop_percentage', 100))
+    many_gears = metrics.get('speed_gear_count', 0) > SPEED_GEAR_MIN
     
-    if avg_speed > 0.8 and speed_cv < 10:
-        if metrics.get('stop_percentage', 100) < 10:
-            return "Threshold"
-    
-    if metrics.get('stop_percentage', 0) > 20:
-        return "Technique"
-    
-    if speed_cv < 8 and metrics.get('stop_percentage', 100) < 15:
-        return "Endurance"
-    
-    if avg_speed < 0.6:
-        return "Recovery"
-    
-    return "Endurance"
+    index = ((cv_bin * (len(AVG_SPEED_EDGES) + 1) + speed_bin)
+             * (len(STOP_PCT_EDGES) + 1) + stop_bin) * 2 + many_gears
+    return WORKOUT_TYPE_TABLE[index]
+
+
+# Scoring lookup tables. Each threshold chain is a step function of one
+# value: bisect_right over the edges picks the bucket, so a value equal to an
+# edge lands in the bucket above it (the "x < edge" side of the old chains).
+# Values are NaN-free here except where noted.
+DISTANCE_EDGES = (500, 1000, 1500, 2000)  # meters
+DISTANCE_SCORES = (5, 10, 15, 20, 25)
+STOP_BONUS_EDGES = (5, 10)  # stop %, NaN gets no bonus
+STOP_BONUS = (3, 1, 0)
+PACE_CV_EDGES = (3, 6, 10, 15)  # speed CV %, NaN scores as erratic
+PACE_SCORES = (25, 20, 15, 10, 5)
+STROKE_CV_EDGES = (5, 10, 15)  # stroke rate CV %, NaN scores as erratic
+STROKE_CV_SCORES = (15, 12, 8, 5)
+STROKE_DROP_EDGES = (2, 4, np.nextafter(5, np.inf))  # spm, only a drop >5 is penalised
+STROKE_DROP_ADJUSTMENTS = (10, 5, 0, -5)
+SPEED_GEAR_EDGES = (1, 3, 5)  # fast segments; no gears is scored from the workout type
+SPEED_GEAR_SCORES = (None, 15, 20, 25)
+GRADE_EDGES = (55, 70, 85)  # total score
+GRADES = ("D", "C", "B", "A")
 
 
 def score_swim_workout(metrics: Dict, workout_type: str) -> Tuple[str, Dict, int]:
     """Score swimming workout (A/B/C/D) and return sub-scores."""
     sub_scores = {}
     
+    distance_m = metrics.get('distance_m', 0)
+    stop_pct = metrics.get('stop_percentage', 100)
+    speed_cv = metrics.get('speed_cv', 100)
+    stroke_cv = metrics.get('stroke_rate_cv', 100)
+    stroke_drop = abs(metrics.get('stroke_rate_drop', 0))
+    gear_count = metrics.get('speed_gear_count', 0)
+    
     # A) Distance Endurance (0-25)
     distance_score = 0
-    distance_m = metrics.get('distance_m', 0)
     if distance_m > 0:
-        if distance_m >= 2000:
-            distance_score = 25
-        elif distance_m >= 1500:
-            distance_score = 20
-        elif distance_m >= 1000:
-            distance_score = 15
-        elif distance_m >= 500:
-            distance_score = 10
-        else:
-            distance_score = 5
-    
-    stop_pct = metrics.get('stop_percentage', 100)
-    if stop_pct < 5:
-        distance_score += 3
-    elif stop_pct < 10:
-        distance_score += 1
+        distance_score = DISTANCE_SCORES[bisect_right(DISTANCE_EDGES, distance_m)]
+    distance_score += STOP_BONUS[bisect_right(STOP_BONUS_EDGES, stop_pct)]
     
     distance_score = min(25, distance_score)
     sub_scores['distance_endurance'] = distance_score
     
     # B) Pace Consistency (0-25)
-    pace_score = 0
-    speed_cv = metrics.get('speed_cv', 100)
-    if speed_cv < 3:
-        pace_score = 25
-    elif speed_cv < 6:
-        pace_score = 20
-    elif speed_cv < 10:
-        pace_score = 15
-    elif speed_cv < 15:
-        pace_score = 10
-    else:
-        pace_score = 5
+    pace_score = PACE_SCORES[bisect_right(PACE_CV_EDGES, speed_cv)]
     
     if stop_pct > 20:
         pace_score = max(0, pace_score - 5)
@@ -210,43 +376,19 @@ def score_swim_workout(metrics: Dict, workout_type: str) -> Tuple[str, Dict, int
     sub_scores['pace_consistency'] = pace_score
     
     # C) Stroke Rate & Stability (0-25)
-    stroke_score = 0
-    stroke_cv = metrics.get('stroke_rate_cv', 100)
-    stroke_drop = abs(metrics.get('stroke_rate_drop', 0))
+    stroke_score = STROKE_CV_SCORES[bisect_right(STROKE_CV_EDGES, stroke_cv)]
+    if not math.isnan(stroke_drop):
+        stroke_score += STROKE_DROP_ADJUSTMENTS[bisect_right(STROKE_DROP_EDGES, stroke_drop)]
     
-    if stroke_cv < 5:
-        stroke_score = 15
-    elif stroke_cv < 10:
-        stroke_score = 12
-    elif stroke_cv < 15:
-        stroke_score = 8
-    else:
-        stroke_score = 5
-    
-    if stroke_drop < 2:
-        stroke_score += 10
-    elif stroke_drop < 4:
-        stroke_score += 5
-    elif stroke_drop > 5:
-        stroke_score = max(0, stroke_score - 5)
-    
-    stroke_score = min(25, stroke_score)
+    stroke_score = min(25, max(0, stroke_score))
     sub_scores['stroke_stability'] = stroke_score
     
     # D) Speed Gear Presence (0-25)
-    speed_gear_score = 0
-    gear_count = metrics.get('speed_gear_count', 0)
-    
-    if gear_count >= 5:
-        speed_gear_score = 25
-    elif gear_count >= 3:
-        speed_gear_score = 20
-    elif gear_count >= 1:
-        speed_gear_score = 15
-    elif metrics.get('has_speed_gears', False):
-        speed_gear_score = 10
-    else:
-        if workout_type == "Endurance":
+    speed_gear_score = SPEED_GEAR_SCORES[bisect_right(SPEED_GEAR_EDGES, gear_count)]
+    if speed_gear_score is None:
+        if metrics.get('has_speed_gears', False):
+            speed_gear_score = 10
+        elif workout_type == "Endurance":
             speed_gear_score = 15
         else:
             speed_gear_score = 5
@@ -254,21 +396,19 @@ def score_swim_workout(metrics: Dict, workout_type: str) -> Tuple[str, Dict, int
     sub_scores['speed_gears'] = speed_gear_score
     
     total_score = sum(sub_scores.values())
-    
-    if total_score >= 85:
-        grade = "A"
-    elif total_score >= 70:
-        grade = "B"
-    elif total_score >= 55:
-        grade = "C"
-    else:
-        grade = "D"
+    grade = GRADES[bisect_right(GRADE_EDGES, total_score)]
     
     return grade, sub_scores, total_score
 
 
-def generate_coach_summary(grade: str, sub_scores: Dict, workout_type: str, metrics: Dict, pros: List[str], cons: List[str]) -> Dict:
-    """Generate a concise coach summary: headline, constraint, action."""
+def generate_coach_summary(grade: str, sub_scores: Dict, workout_type: str, metrics: Dict, pros: List[str], cons: List[str],
+                           min_score_key: Optional[str] = None, prescription: Optional[Dict] = None) -> Dict:
+    """
+    Generate a concise coach summary: headline, constraint, action.
+    
+    min_score_key and prescription are derived from the other arguments when
+    not given; analyze_workout passes the ones it has already computed.
+    """
     summary = {}
     
     # Headline: What went well (1 sentence)
@@ -296,7 +436,8 @@ def generate_coach_summary(grade: str, sub_scores: Dict, workout_type: str, metr
     
     # Constraint: What limited performance (1 sentence)
     # Use the lowest scoring metric or top con
-    min_score_key = min(sub_scores, key=sub_scores.get)
+    if min_score_key is None:
+        min_score_key = min(sub_scores, key=sub_scores.get)
     min_score = sub_scores[min_score_key]
     
     if min_score < 15:
@@ -319,7 +460,8 @@ def generate_coach_summary(grade: str, sub_scores: Dict, workout_type: str, metr
     
     # Action: What to do next session (1 sentence)
     # Based on the prescription key focus
-    prescription = prescribe_next_workout(grade, sub_scores, workout_type, metrics)
+    if prescription is None:
+        prescription = prescribe_next_workout(grade, sub_scores, workout_type, metrics, min_score_key)
     key_focus = prescription.get('key_focus', 'Aerobic base')
     
     if min_score_key == 'speed_gears':
@@ -338,12 +480,14 @@ def generate_coach_summary(grade: str, sub_scores: Dict, workout_type: str, metr
     return summary
 
 
-def generate_verdict(grade: str, sub_scores: Dict, workout_type: str, metrics: Dict) -> str:
+def generate_verdict(grade: str, sub_scores: Dict, workout_type: str, metrics: Dict,
+                     min_score_key: Optional[str] = None) -> str:
     """Generate one-line verdict based on grade and metrics."""
     if grade == "A":
         return "Strong execution across all metrics — excellent session"
     elif grade == "B":
-        min_score_key = min(sub_scores, key=sub_scores.get)
+        if min_score_key is None:
+            min_score_key = min(sub_scores, key=sub_scores.get)
         if min_score_key == 'speed_gears':
             return "Strong aerobic base, speed gear missing"
         elif min_score_key == 'pace_consistency':
@@ -421,9 +565,11 @@ def generate_pros_cons(metrics: Dict, sub_scores: Dict, workout_type: str) -> Tu
     return pros[:3], cons[:3]
 
 
-def prescribe_next_workout(grade: str, sub_scores: Dict, workout_type: str, metrics: Dict) -> Dict:
+def prescribe_next_workout(grade: str, sub_scores: Dict, workout_type: str, metrics: Dict,
+                           min_score_key: Optional[str] = None) -> Dict:
     """Prescribe the next workout based on current state."""
-    min_score_key = min(sub_scores, key=sub_scores.get)
+    if min_score_key is None:
+        min_score_key = min(sub_scores, key=sub_scores.get)
     prescription = {}
     
     if min_score_key == 'speed_gears' or (workout_type == "Endurance" and not metrics.get('has_speed_gears', False)):
@@ -475,28 +621,149 @@ def format_speed(speed_ms: float) -> str:
     return f"{minutes}:{seconds:02d}/100m"
 
 
+def _array_to_list(values: np.ndarray) -> list:
+    """ndarray.tolist() with NaN entries as None."""
+    if values.dtype.kind == 'f':
+        nan_mask = np.isnan(values)
+        if nan_mask.any():
+            return np.where(nan_mask, None, values.astype(object)).tolist()
+    return values.tolist()
+
+
 def convert_to_native_types(obj):
-    """Convert NumPy/pandas types to native Python types for JSON serialization."""
+    """Convert NumPy/pandas types to native Python types for JSON serialization.
+    
+    NaN becomes None, as it does when orjson serializes the result.
+    """
     if isinstance(obj, (np.integer, np.int64, np.int32)):
         return int(obj)
     elif isinstance(obj, (np.floating, np.float64, np.float32)):
-        return float(obj)
+        return None if np.isnan(obj) else float(obj)
     elif isinstance(obj, np.ndarray):
-        return obj.tolist()
+        return _array_to_list(obj)
     elif isinstance(obj, pd.Series):
-        return obj.tolist()
+        return _array_to_list(obj.to_numpy())
     elif isinstance(obj, dict):
         return {key: convert_to_native_types(value) for key, value in obj.items()}
     elif isinstance(obj, list):
         return [convert_to_native_types(item) for item in obj]
-    elif pd.isna(obj):
+    elif isinstance(obj, float) and math.isnan(obj):
+        return None
+    elif obj is pd.NaT or obj is pd.NA:
         return None
     else:
         return obj
 
 
+def orjson_default(obj):
+    """Fallback for the few values orjson doesn't serialize natively.
+    
+    Shared by to_native_result and main.json_response. pandas Timestamps are
+    datetime subclasses, which orjson doesn't serialize either.
+    """
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):  # pandas Series, non-contiguous arrays
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def to_native_result(result: Dict) -> Dict:
+    """Convert an analysis result holding NumPy values into plain Python types.
+    
+    With orjson installed the result is serialized in C (arrays included) and
+    parsed back. Otherwise falls back to convert_to_native_types. Either way
+    NaN comes out as None, just like it would in the JSON response.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(orjson.dumps(
+            result, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY
+        ))
+    return convert_to_native_types(result)
+
+
+# Columns the analysis reads: per-sample series and first-row session values
+SAMPLE_COLUMNS = ('enhanced_speed', 'speed', 'cadence')
+SESSION_COLUMNS = (
+    'session_start_time', 'session_total_distance', 'session_total_elapsed_time',
+    'session_pool_length', 'session_avg_cadence', 'session_avg_speed',
+)
+ANALYSIS_CACHE_SIZE = 128
+_analysis_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+
+def workout_cache_key(df: pd.DataFrame) -> str:
+    """
+    Content hash of the parts of a workout DataFrame the analysis depends on.
+    
+    Args:
+        df: Workout DataFrame
+        
+    Returns:
+        Hex digest (blake2b, 16 bytes)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(df)).encode())
+    for col in SAMPLE_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy()
+        digest.update(f"{col}:{values.dtype}".encode())
+        if values.dtype == object:
+            values = pd.util.hash_pandas_object(df[col], index=False).to_numpy()
+        digest.update(np.ascontiguousarray(values).tobytes())
+    if len(df) > 0:
+        for col in SESSION_COLUMNS:
+            if col in df.columns:
+                digest.update(f"{col}={df[col].iloc[0]!r}".encode())
+    return digest.hexdigest()
+
+
+def _copy_result(result: Dict) -> Dict:
+    """Independent copy of a cached result, since callers annotate it in place."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(orjson.dumps(result))
+    return copy.deepcopy(result)
+
+
 def analyze_workout(df: pd.DataFrame) -> Dict:
-    """Complete analysis pipeline for a single workout."""
+    """
+    Complete analysis pipeline for a single workout.
+    
+    Results are memoized on a content hash of the columns the analysis reads
+    (ANALYSIS_CACHE_SIZE most recent workouts), so re-analyzing the same
+    workout returns a copy of the earlier result.
+    """
+    has_samples = any(col in df.columns for col in SAMPLE_COLUMNS)
+    if len(df) == 0 or not (has_samples or any(col in df.columns for col in SESSION_COLUMNS)):
+        has_speed = 'enhanced_speed' in df.columns or 'speed' in df.columns
+        return _copy_result(EMPTY_RESULTS[has_speed])
+    if not has_samples:
+        return _analyze_workout(df)
+    
+    key = workout_cache_key(df)
+    with _analysis_cache_lock:
+        cached = _analysis_cache.get(key)
+        if cached is not None:
+            _analysis_cache.move_to_end(key)
+    if cached is not None:
+        return _copy_result(cached)
+    
+    result = _analyze_workout(df)
+    with _analysis_cache_lock:
+        _analysis_cache[key] = result
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    return _copy_result(result)
+
+
+def _analyze_workout(df: pd.DataFrame) -> Dict:
+    """Run the analysis pipeline for a single workout (uncached)."""
     metadata = load_swim_data(df)
     metrics = calculate_swim_metrics(df)
     workout_type = detect_workout_type(df, metrics)
@@ -506,10 +773,13 @@ def analyze_workout(df: pd.DataFrame) -> Dict:
     
     # Score workout
     grade, sub_scores, total_score = score_swim_workout(metrics, workout_type)
-    verdict = generate_verdict(grade, sub_scores, workout_type, metrics)
+    # Weakest area drives the verdict, prescription and coach summary alike
+    min_score_key = min(sub_scores, key=sub_scores.get)
+    verdict = generate_verdict(grade, sub_scores, workout_type, metrics, min_score_key)
     pros, cons = generate_pros_cons(metrics, sub_scores, workout_type)
-    prescription = prescribe_next_workout(grade, sub_scores, workout_type, metrics)
-    coach_summary = generate_coach_summary(grade, sub_scores, workout_type, metrics, pros, cons)
+    prescription = prescribe_next_workout(grade, sub_scores, workout_type, metrics, min_score_key)
+    coach_summary = generate_coach_summary(grade, sub_scores, workout_type, metrics, pros, cons,
+                                           min_score_key, prescription)
     
     # Prepare result with all data
     result = {
@@ -525,12 +795,12 @@ def analyze_workout(df: pd.DataFrame) -> Dict:
             'stroke_rate_drop': metrics.get('stroke_rate_drop', 0),
             'speed_gear_count': metrics.get('speed_gear_count', 0),
             'has_speed_gears': metrics.get('has_speed_gears', False),
-            'speed_data': metrics.get('speed', []).tolist() if 'speed' in metrics and len(metrics.get('speed', [])) > 0 else [],
-            'stroke_rate_data': metrics.get('stroke_rate', []).tolist() if 'stroke_rate' in metrics and len(metrics.get('stroke_rate', [])) > 0 else [],
+            'speed_data': metrics.get('speed', []),
+            'stroke_rate_data': metrics.get('stroke_rate', []),
             'efficiency_avg': metrics.get('efficiency_avg', 0),
-            'efficiency_data': metrics.get('efficiency_data', []).tolist() if 'efficiency_data' in metrics and len(metrics.get('efficiency_data', [])) > 0 else [],
-            'speed_for_efficiency': metrics.get('speed_for_efficiency', []).tolist() if 'speed_for_efficiency' in metrics and len(metrics.get('speed_for_efficiency', [])) > 0 else [],
-            'stroke_rate_for_efficiency': metrics.get('stroke_rate_for_efficiency', []).tolist() if 'stroke_rate_for_efficiency' in metrics and len(metrics.get('stroke_rate_for_efficiency', [])) > 0 else [],
+            'efficiency_data': metrics.get('efficiency_data', []),
+            'speed_for_efficiency': metrics.get('speed_for_efficiency', []),
+            'stroke_rate_for_efficiency': metrics.get('stroke_rate_for_efficiency', []),
         },
         'workout_type': workout_type,
         'grade': grade,
@@ -543,5 +813,13 @@ def analyze_workout(df: pd.DataFrame) -> Dict:
         'prescription': prescription
     }
     
-    # Convert all NumPy/pandas types to native Python types
-    return convert_to_native_types(result)
\ No newline at end of file
+    # Convert all NumPy/pandas types (sample arrays included) to native Python types
+    return to_native_result(result)
+
+
+# Results for workouts with no data to analyze, keyed by whether the frame has
+# a speed column (an empty one still sets the speed metrics to their worst case)
+EMPTY_RESULTS = {
+    False: _analyze_workout(pd.DataFrame()),
+    True: _analyze_workout(pd.DataFrame({'speed': pd.Series([], dtype=float)})),
+}
@@ -3,16 +3,16 @@ Comparison engine for analyzing multiple swimming workouts over time.
 Provides coach-like insights and reasoning.
 """
 
+import io
+import math
+from collections import Counter
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from statistics import fmean
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
-import sys
-from pathlib import Path
-
-# Add backend directory to path
-sys.path.insert(0, str(Path(__file__).parent))
 
+# Importers (main.py, strava_oauth.py) put the backend directory on sys.path
 from analysis_engine import analyze_workout
 
 
@@ -29,9 +29,15 @@ def analyze_multiple_workouts(workout_dataframes: List[pd.DataFrame]) -> Dict:
     if len(workout_dataframes) == 0:
         return {"error": "No workouts provided"}
     
-    # Analyze each workout
+    # Analyze each workout. analyze_workout's memo is per process: /api/compare
+    # runs this in a pool worker, so repeated uploads only hit it when they
+    # land on the same worker, and /api/analyze results are never shared
     workouts = []
     for i, df in enumerate(workout_dataframes):
+        # analyze_workout copes with missing columns and empty frames itself;
+        # only things that aren't frames at all are known not to analyze
+        if not isinstance(df, pd.DataFrame):
+            continue
         try:
             analysis = analyze_workout(df)
             analysis['workout_number'] = i + 1
@@ -42,20 +48,35 @@ def analyze_multiple_workouts(workout_dataframes: List[pd.DataFrame]) -> Dict:
     if len(workouts) == 0:
         return {"error": "Could not analyze any workouts"}
     
-    # Sort by date (most recent first)
-    workouts.sort(key=lambda x: x.get('metadata', {}).get('date', ''), reverse=False)
+    # Sort by date (oldest first)
+    workouts.sort(key=lambda x: x.get('metadata', {}).get('date') or '')
     
     # Extract time series data
     time_series = extract_time_series(workouts)
     
+    if len(workouts) == 1:
+        # Nothing to compare: trends, insights and recommendations are all
+        # empty, so skip straight to the summaries
+        strengths_weaknesses = {'strengths': [], 'weaknesses': []}
+        return {
+            'workouts': workouts,
+            'time_series': time_series,
+            'trends': {},
+            'insights': [],
+            'strengths_weaknesses': strengths_weaknesses,
+            'recommendations': [],
+            'summary': generate_summary(workouts, {}),
+            'coach_summary': generate_multi_workout_coach_summary(workouts, {}, strengths_weaknesses, time_series)
+        }
+    
     # Calculate trends
-    trends = calculate_trends(workouts)
+    trends = calculate_trends(workouts, time_series)
     
     # Generate coach insights
     insights = generate_coach_insights(workouts, trends)
     
     # Identify strengths and weaknesses
-    strengths_weaknesses = identify_strengths_weaknesses(workouts, trends)
+    strengths_weaknesses = identify_strengths_weaknesses(workouts, trends, time_series)
     
     # Training recommendations
     recommendations = generate_training_recommendations(workouts, trends, strengths_weaknesses)
@@ -75,111 +96,119 @@ def analyze_multiple_workouts(workout_dataframes: List[pd.DataFrame]) -> Dict:
     }
 
 
-def extract_time_series(workouts: List[Dict]) -> Dict:
-    """Extract time series data for visualization."""
-    dates = []
-    distances = []
-    times = []
-    speeds = []
-    stroke_rates = []
-    scores = []
-    grades = []
-    sub_scores = {
-        'distance_endurance': [],
-        'pace_consistency': [],
-        'stroke_stability': [],
-        'speed_gears': []
-    }
+def analyze_csv_files(csv_contents: List[bytes]) -> Optional[Dict]:
+    """
+    Parse raw CSV file contents and compare the non-empty workouts.
     
-    for w in workouts:
-        metadata = w.get('metadata', {})
-        metrics = w.get('metrics', {})
-        
-        date_str = metadata.get('date', '')
-        dates.append(date_str)
-        distances.append(metrics.get('distance_m', 0))
-        times.append(metrics.get('total_time_sec', 0))
-        speeds.append(metrics.get('avg_speed_ms', 0))
-        stroke_rates.append(metrics.get('avg_stroke_rate', 0))
-        scores.append(w.get('total_score', 0))
-        grades.append(w.get('grade', 'N/A'))
+    Takes bytes rather than DataFrames so it can run in a worker process
+    (see /api/compare in main.py) with only the uploads pickled across.
+    
+    Args:
+        csv_contents: Contents of each CSV file
         
-        sub_s = w.get('sub_scores', {})
-        for key in sub_scores.keys():
-            sub_scores[key].append(sub_s.get(key, 0))
+    Returns:
+        analyze_multiple_workouts() output, or None if fewer than 2 files
+        contain data
+    """
+    dataframes = (pd.read_csv(io.BytesIO(contents)) for contents in csv_contents)
+    workout_dataframes = [df for df in dataframes if not df.empty]
+    if len(workout_dataframes) < 2:
+        return None
+    return analyze_multiple_workouts(workout_dataframes)
+
+
+# Sub-scores in the order they are reported
+SUB_SCORE_KEYS = ('distance_endurance', 'pace_consistency', 'stroke_stability', 'speed_gears')
+
+
+def extract_time_series(workouts: List[Dict]) -> Dict:
+    """Extract time series data for visualization."""
+    # Build each series as one column comprehension instead of appending to
+    # every list per workout
+    metadata = [w.get('metadata', {}) for w in workouts]
+    metrics = [w.get('metrics', {}) for w in workouts]
+    sub_scores = [w.get('sub_scores', {}) for w in workouts]
     
     return {
-        'dates': dates,
-        'distances': distances,
-        'times': times,
-        'speeds': speeds,
-        'stroke_rates': stroke_rates,
-        'scores': scores,
-        'grades': grades,
-        'sub_scores': sub_scores
+        'dates': [m.get('date', '') for m in metadata],
+        'distances': [m.get('distance_m', 0) for m in metrics],
+        'times': [m.get('total_time_sec', 0) for m in metrics],
+        'speeds': [m.get('avg_speed_ms', 0) for m in metrics],
+        'stroke_rates': [m.get('avg_stroke_rate', 0) for m in metrics],
+        'scores': [w.get('total_score', 0) for w in workouts],
+        'grades': [w.get('grade', 'N/A') for w in workouts],
+        'sub_scores': {key: [s.get(key, 0) for s in sub_scores] for key in SUB_SCORE_KEYS}
     }
 
 
-def calculate_trends(workouts: List[Dict]) -> Dict:
-    """Calculate trends across workouts."""
+# Trends reported for the top-level series: (trend name, time series key)
+TREND_SERIES = (('distance', 'distances'), ('speed', 'speeds'), ('score', 'scores'))
+
+
+def calculate_trends(workouts: List[Dict], time_series: Dict) -> Dict:
+    """
+    Calculate trends across workouts.
+    
+    Args:
+        workouts: Analyzed workouts, in date order
+        time_series: extract_time_series() output for the same workouts
+    """
     if len(workouts) < 2:
         return {}
     
-    time_series = extract_time_series(workouts)
+    # Every series has one value per workout, so stack them and compare the
+    # mean of the earlier half of the workouts with the later half in one go
+    names = [name for name, _ in TREND_SERIES] + [f'sub_score_{key}' for key in time_series['sub_scores']]
+    series = np.array(
+        [time_series[column] for _, column in TREND_SERIES] + list(time_series['sub_scores'].values()),
+        dtype=float
+    )
+    half = series.shape[1] // 2
+    first_halves = series[:, :half].mean(axis=1)
+    second_halves = series[:, half:].mean(axis=1)
+    averages = series.mean(axis=1)
+    changes = second_halves - first_halves
+    # Percent change is reported as 0 unless the first half is positive
+    change_pcts = np.divide(changes, first_halves, out=np.zeros_like(changes), where=first_halves > 0)
+    change_pcts *= 100
+    # A zero first half gives inf/NaN here, which counts as not stable
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative_changes = np.abs(changes) / first_halves
     
     trends = {}
-    
-    # Distance trend
-    distances = time_series['distances']
-    if len(distances) >= 2:
-        first_half = np.mean(distances[:len(distances)//2])
-        second_half = np.mean(distances[len(distances)//2:])
-        trends['distance'] = {
-            'direction': 'improving' if second_half > first_half else 'declining',
-            'change_pct': ((second_half - first_half) / first_half * 100) if first_half > 0 else 0,
-            'avg': np.mean(distances),
-            'trend': 'stable' if abs(second_half - first_half) / first_half < 0.05 else ('up' if second_half > first_half else 'down')
-        }
-    
-    # Speed trend
-    speeds = time_series['speeds']
-    if len(speeds) >= 2:
-        first_half = np.mean(speeds[:len(speeds)//2])
-        second_half = np.mean(speeds[len(speeds)//2:])
-        trends['speed'] = {
+    for name, first_half, second_half, change_pct, relative_change, avg in zip(
+            names, first_halves, second_halves, change_pcts, relative_changes, averages):
+        trends[name] = {
             'direction': 'improving' if second_half > first_half else 'declining',
-            'change_pct': ((second_half - first_half) / first_half * 100) if first_half > 0 else 0,
-            'avg': np.mean(speeds),
-            'trend': 'stable' if abs(second_half - first_half) / first_half < 0.05 else ('up' if second_half > first_half else 'down')
+            'change_pct': change_pct,
+            'avg': avg,
+            'trend': 'stable' if relative_change < 0.05 else ('up' if second_half > first_half else 'down')
         }
     
-    # Score trend
-    scores = time_series['scores']
-    if len(scores) >= 2:
-        first_half = np.mean(scores[:len(scores)//2])
-        second_half = np.mean(scores[len(scores)//2:])
-        trends['score'] = {
-            'direction': 'improving' if second_half > first_half else 'declining',
-            'change_pct': ((second_half - first_half) / first_half * 100) if first_half > 0 else 0,
-            'avg': np.mean(scores),
-            'trend': 'stable' if abs(second_half - first_half) / first_half < 0.05 else ('up' if second_half > first_half else 'down')
-        }
-    
-    # Sub-score trends
-    for key, values in time_series['sub_scores'].items():
-        if len(values) >= 2:
-            first_half = np.mean(values[:len(values)//2])
-            second_half = np.mean(values[len(values)//2:])
-            trends[f'sub_score_{key}'] = {
-                'direction': 'improving' if second_half > first_half else 'declining',
-                'change_pct': ((second_half - first_half) / first_half * 100) if first_half > 0 else 0,
-                'avg': np.mean(values),
-                'trend': 'stable' if abs(second_half - first_half) / first_half < 0.05 else ('up' if second_half > first_half else 'down')
-            }
-    
     return trends
 
 
+# Insights with fixed text; appended as copies so callers can't mutate them
+STABLE_SPEED_INSIGHT = {
+    'type': 'info',
+    'title': 'Speed Consistency',
+    'message': 'Your average speed is holding steady across workouts.',
+    'reasoning': 'Stable speed with increasing volume suggests good aerobic efficiency. Consider adding speed work to develop higher gears.'
+}
+LOW_VARIABILITY_INSIGHT = {
+    'type': 'positive',
+    'title': 'Excellent Consistency',
+    'message': 'Your performance is very consistent across workouts.',
+    'reasoning': 'Low variability indicates good execution and appropriate training load. This is a sign of mature training.'
+}
+HIGH_VARIABILITY_INSIGHT = {
+    'type': 'warning',
+    'title': 'High Variability',
+    'message': 'Your performance varies significantly between workouts.',
+    'reasoning': 'High variability could indicate inconsistent effort, recovery issues, or training load fluctuations. Aim for more consistent execution.'
+}
+
+
 def generate_coach_insights(workouts: List[Dict], trends: Dict) -> List[Dict]:
     """Generate coach-like insights with reasoning."""
     insights = []
@@ -220,12 +249,7 @@ def generate_coach_insights(workouts: List[Dict], trends: Dict) -> List[Dict]:
     if 'speed' in trends:
         speed_trend = trends['speed']
         if speed_trend['trend'] == 'stable':
-            insights.append({
-                'type': 'info',
-                'title': 'Speed Consistency',
-                'message': 'Your average speed is holding steady across workouts.',
-                'reasoning': 'Stable speed with increasing volume suggests good aerobic efficiency. Consider adding speed work to develop higher gears.'
-            })
+            insights.append({**STABLE_SPEED_INSIGHT})
         elif speed_trend['trend'] == 'up':
             insights.append({
                 'type': 'positive',
@@ -239,11 +263,12 @@ def generate_coach_insights(workouts: List[Dict], trends: Dict) -> List[Dict]:
     
     # Find strongest and weakest areas
     if sub_score_trends:
-        improving = [k for k, v in sub_score_trends.items() if v['trend'] == 'up']
-        declining = [k for k, v in sub_score_trends.items() if v['trend'] == 'down']
+        # Only the first improving and first declining area are reported
+        improving = next((k for k, v in sub_score_trends.items() if v['trend'] == 'up'), None)
+        declining = next((k for k, v in sub_score_trends.items() if v['trend'] == 'down'), None)
         
         if improving:
-            best_area = improving[0].replace('sub_score_', '').replace('_', ' ').title()
+            best_area = improving.replace('sub_score_', '').replace('_', ' ').title()
             insights.append({
                 'type': 'positive',
                 'title': f'Strongest Area: {best_area}',
@@ -252,7 +277,7 @@ def generate_coach_insights(workouts: List[Dict], trends: Dict) -> List[Dict]:
             })
         
         if declining:
-            weak_area = declining[0].replace('sub_score_', '').replace('_', ' ').title()
+            weak_area = declining.replace('sub_score_', '').replace('_', ' ').title()
             insights.append({
                 'type': 'warning',
                 'title': f'Area Needing Attention: {weak_area}',
@@ -263,62 +288,61 @@ def generate_coach_insights(workouts: List[Dict], trends: Dict) -> List[Dict]:
     # Consistency check
     scores = [w.get('total_score', 0) for w in workouts]
     if len(scores) >= 3:
-        score_cv = np.std(scores) / np.mean(scores) * 100 if np.mean(scores) > 0 else 0
+        # Plain-float stats: these lists are a few workouts long, far below
+        # the size where NumPy's array conversion pays off
+        mean_score = fmean(scores)
+        score_std = math.sqrt(fmean([(s - mean_score) ** 2 for s in scores]))  # Population std, as np.std
+        score_cv = score_std / mean_score * 100 if mean_score > 0 else 0
         if score_cv < 10:
-            insights.append({
-                'type': 'positive',
-                'title': 'Excellent Consistency',
-                'message': 'Your performance is very consistent across workouts.',
-                'reasoning': 'Low variability indicates good execution and appropriate training load. This is a sign of mature training.'
-            })
+            insights.append({**LOW_VARIABILITY_INSIGHT})
         elif score_cv > 20:
-            insights.append({
-                'type': 'warning',
-                'title': 'High Variability',
-                'message': 'Your performance varies significantly between workouts.',
-                'reasoning': 'High variability could indicate inconsistent effort, recovery issues, or training load fluctuations. Aim for more consistent execution.'
-            })
+            insights.append({**HIGH_VARIABILITY_INSIGHT})
     
     return insights
 
 
-def identify_strengths_weaknesses(workouts: List[Dict], trends: Dict) -> Dict:
-    """Identify consistent strengths and weaknesses."""
+def identify_strengths_weaknesses(workouts: List[Dict], trends: Dict,
+                                  time_series: Optional[Dict] = None) -> Dict:
+    """
+    Identify consistent strengths and weaknesses.
+    
+    Args:
+        workouts: Analyzed workouts
+        trends: calculate_trends() output
+        time_series: extract_time_series() output for the same workouts; its
+            sub-score columns are reused instead of reading every workout again
+    """
     if len(workouts) < 2:
         return {'strengths': [], 'weaknesses': []}
     
-    # Calculate average sub-scores
-    avg_sub_scores = {
-        'distance_endurance': [],
-        'pace_consistency': [],
-        'stroke_stability': [],
-        'speed_gears': []
-    }
-    
-    for w in workouts:
-        sub_s = w.get('sub_scores', {})
-        for key in avg_sub_scores.keys():
-            avg_sub_scores[key].append(sub_s.get(key, 0))
-    
-    # Calculate averages
-    avg_scores = {k: np.mean(v) for k, v in avg_sub_scores.items()}
+    # Average sub-scores: one (sub-scores x workouts) matrix, reduced per row
+    if time_series is not None:
+        sub_score_matrix = np.array([time_series['sub_scores'][key] for key in SUB_SCORE_KEYS], dtype=np.float64)
+    else:
+        sub_score_matrix = np.fromiter(
+            (w.get('sub_scores', {}).get(key, 0) for key in SUB_SCORE_KEYS for w in workouts),
+            dtype=np.float64, count=len(workouts) * len(SUB_SCORE_KEYS)
+        ).reshape(len(SUB_SCORE_KEYS), -1)
+    avg_scores = dict(zip(SUB_SCORE_KEYS, sub_score_matrix.mean(axis=1).tolist()))
     
     # Identify strengths (above average)
     strengths = []
     weaknesses = []
     
-    overall_avg = np.mean(list(avg_scores.values()))
+    overall_avg = fmean(avg_scores.values())
     
     for key, value in avg_scores.items():
         name = key.replace('_', ' ').title()
         if value >= overall_avg + 3:  # Significantly above average
             strengths.append({
+                'key': key,
                 'area': name,
                 'score': value,
                 'reasoning': get_strength_reasoning(key, value)
             })
         elif value <= overall_avg - 3:  # Significantly below average
             weaknesses.append({
+                'key': key,
                 'area': name,
                 'score': value,
                 'reasoning': get_weakness_reasoning(key, value)
@@ -331,26 +355,71 @@ def identify_strengths_weaknesses(workouts: List[Dict], trends: Dict) -> Dict:
     }
 
 
+# Reasoning templates per sub-score area, formatted with the area's score
+STRENGTH_REASONING = {
+    'distance_endurance': "Your ability to sustain volume (score: {score:.1f}/25) shows strong aerobic base. You can handle longer sessions without breakdown.",
+    'pace_consistency': "Excellent pacing control (score: {score:.1f}/25) indicates good race execution skills. You maintain target speeds well.",
+    'stroke_stability': "Consistent stroke rate (score: {score:.1f}/25) shows good technique maintenance under fatigue. Your form holds up.",
+    'speed_gears': "Good speed variation (score: {score:.1f}/25) means you're using multiple intensity zones effectively in training."
+}
+DEFAULT_STRENGTH_REASONING = "Strong performance in this area (score: {score:.1f}/25)."
+
+WEAKNESS_REASONING = {
+    'distance_endurance': "Lower endurance scores (score: {score:.1f}/25) suggest you need to build volume gradually. Focus on continuous swimming.",
+    'pace_consistency': "Pacing variability (score: {score:.1f}/25) indicates you need more structured sets. Practice even splits.",
+    'stroke_stability': "Stroke rate instability (score: {score:.1f}/25) suggests technique breaks down. Add form-focused drills.",
+    'speed_gears': "Limited speed work (score: {score:.1f}/25) means you're missing high-intensity stimulus. Add fast intervals."
+}
+DEFAULT_WEAKNESS_REASONING = "This area needs attention (score: {score:.1f}/25)."
+
+
 def get_strength_reasoning(area: str, score: float) -> str:
     """Get reasoning for strength areas."""
-    reasoning_map = {
-        'distance_endurance': f"Your ability to sustain volume (score: {score:.1f}/25) shows strong aerobic base. You can handle longer sessions without breakdown.",
-        'pace_consistency': f"Excellent pacing control (score: {score:.1f}/25) indicates good race execution skills. You maintain target speeds well.",
-        'stroke_stability': f"Consistent stroke rate (score: {score:.1f}/25) shows good technique maintenance under fatigue. Your form holds up.",
-        'speed_gears': f"Good speed variation (score: {score:.1f}/25) means you're using multiple intensity zones effectively in training."
-    }
-    return reasoning_map.get(area, f"Strong performance in this area (score: {score:.1f}/25).")
+    return STRENGTH_REASONING.get(area, DEFAULT_STRENGTH_REASONING).format(score=score)
 
 
 def get_weakness_reasoning(area: str, score: float) -> str:
     """Get reasoning for weakness areas."""
-    reasoning_map = {
-        'distance_endurance': f"Lower endurance scores (score: {score:.1f}/25) suggest you need to build volume gradually. Focus on continuous swimming.",
-        'pace_consistency': f"Pacing variability (score: {score:.1f}/25) indicates you need more structured sets. Practice even splits.",
-        'stroke_stability': f"Stroke rate instability (score: {score:.1f}/25) suggests technique breaks down. Add form-focused drills.",
-        'speed_gears': f"Limited speed work (score: {score:.1f}/25) means you're missing high-intensity stimulus. Add fast intervals."
-    }
-    return reasoning_map.get(area, f"This area needs attention (score: {score:.1f}/25).")
+    return WEAKNESS_REASONING.get(area, DEFAULT_WEAKNESS_REASONING).format(score=score)
+
+
+# Training recommendation for the weakest sub-score area
+WEAKNESS_RECOMMENDATIONS = {
+    'distance_endurance': {
+        'focus': 'Build Aerobic Base',
+        'recommendation': '3×500 continuous @ easy-moderate, 1 min rest. Build volume gradually.',
+        'reasoning': 'Your endurance is the limiter. Focus on continuous swimming to build aerobic capacity.',
+        'frequency': '2-3x per week'
+    },
+    'pace_consistency': {
+        'focus': 'Pacing Control',
+        'recommendation': '6×200 @ controlled pace, 30s rest. Rep 1 must feel "too easy".',
+        'reasoning': 'Inconsistent pacing suggests you need more structured sets with specific pace targets.',
+        'frequency': '1-2x per week'
+    },
+    'stroke_stability': {
+        'focus': 'Technique & Stroke Rate',
+        'recommendation': '10×100 @ steady, 15s rest. Count strokes per length, maintain rhythm.',
+        'reasoning': 'Stroke rate instability indicates technique breakdown. Focus on form over speed.',
+        'frequency': '2x per week'
+    },
+    'speed_gears': {
+        'focus': 'Speed Development',
+        'recommendation': '12×100 @ moderate-hard, 20s rest. Hold stroke rate 34-36 spm.',
+        'reasoning': 'You need more speed work to develop higher gears. Add controlled intensity.',
+        'frequency': '1-2x per week'
+    },
+}
+
+# Recommendation for building on the strongest area (only endurance has one)
+STRENGTH_RECOMMENDATIONS = {
+    'distance_endurance': {
+        'focus': 'Leverage Endurance Strength',
+        'recommendation': 'Use your strong endurance base for longer threshold sets: 4×400 @ threshold, 45s rest.',
+        'reasoning': 'Your endurance is a strength. Use it to build threshold fitness with longer intervals.',
+        'frequency': '1x per week'
+    },
+}
 
 
 def generate_training_recommendations(workouts: List[Dict], trends: Dict, strengths_weaknesses: Dict) -> List[Dict]:
@@ -363,54 +432,16 @@ def generate_training_recommendations(workouts: List[Dict], trends: Dict, streng
     # Priority 1: Address weakest area
     if weaknesses:
         weakest = min(weaknesses, key=lambda x: x['score'])
-        area = weakest['area'].lower()
-        
-        if 'distance' in area or 'endurance' in area:
-            recommendations.append({
-                'priority': 'High',
-                'focus': 'Build Aerobic Base',
-                'recommendation': '3×500 continuous @ easy-moderate, 1 min rest. Build volume gradually.',
-                'reasoning': 'Your endurance is the limiter. Focus on continuous swimming to build aerobic capacity.',
-                'frequency': '2-3x per week'
-            })
-        elif 'pace' in area or 'consistency' in area:
-            recommendations.append({
-                'priority': 'High',
-                'focus': 'Pacing Control',
-                'recommendation': '6×200 @ controlled pace, 30s rest. Rep 1 must feel "too easy".',
-                'reasoning': 'Inconsistent pacing suggests you need more structured sets with specific pace targets.',
-                'frequency': '1-2x per week'
-            })
-        elif 'stroke' in area or 'stability' in area:
-            recommendations.append({
-                'priority': 'High',
-                'focus': 'Technique & Stroke Rate',
-                'recommendation': '10×100 @ steady, 15s rest. Count strokes per length, maintain rhythm.',
-                'reasoning': 'Stroke rate instability indicates technique breakdown. Focus on form over speed.',
-                'frequency': '2x per week'
-            })
-        elif 'speed' in area or 'gear' in area:
-            recommendations.append({
-                'priority': 'High',
-                'focus': 'Speed Development',
-                'recommendation': '12×100 @ moderate-hard, 20s rest. Hold stroke rate 34-36 spm.',
-                'reasoning': 'You need more speed work to develop higher gears. Add controlled intensity.',
-                'frequency': '1-2x per week'
-            })
+        recommendation = WEAKNESS_RECOMMENDATIONS.get(weakest['key'])
+        if recommendation:
+            recommendations.append({'priority': 'High', **recommendation})
     
     # Priority 2: Build on strengths
     if strengths:
         strongest = max(strengths, key=lambda x: x['score'])
-        area = strongest['area'].lower()
-        
-        if 'distance' in area or 'endurance' in area:
-            recommendations.append({
-                'priority': 'Medium',
-                'focus': 'Leverage Endurance Strength',
-                'recommendation': 'Use your strong endurance base for longer threshold sets: 4×400 @ threshold, 45s rest.',
-                'reasoning': 'Your endurance is a strength. Use it to build threshold fitness with longer intervals.',
-                'frequency': '1x per week'
-            })
+        recommendation = STRENGTH_RECOMMENDATIONS.get(strongest['key'])
+        if recommendation:
+            recommendations.append({'priority': 'Medium', **recommendation})
     
     # Priority 3: Overall progression
     if 'score' in trends and trends['score']['trend'] == 'up':
@@ -500,7 +531,7 @@ def generate_multi_workout_coach_summary(workouts: List[Dict], trends: Dict, str
     else:
         # Check for consistent high performance
         recent_scores = time_series['scores'][-3:] if len(time_series['scores']) >= 3 else time_series['scores']
-        if recent_scores and np.mean(recent_scores) >= 70:
+        if recent_scores and fmean(recent_scores) >= 70:
             headline = "Maintaining strong performance — consistent execution across workouts."
         else:
             headline = "Building your base — every workout contributes to progress."
@@ -589,21 +620,27 @@ def generate_summary(workouts: List[Dict], trends: Dict) -> Dict:
     if len(workouts) == 0:
         return {}
     
-    total_distance = sum(w.get('metrics', {}).get('distance_m', 0) for w in workouts)
-    avg_score = np.mean([w.get('total_score', 0) for w in workouts])
-    grade_distribution = {}
-    
+    # Distance total, score total and grade histogram in one pass
+    total_distance = 0
+    score_sum = 0
+    grade_distribution = Counter()
     for w in workouts:
-        grade = w.get('grade', 'N/A')
-        grade_distribution[grade] = grade_distribution.get(grade, 0) + 1
+        # Analysis results carry a missing (NaN) session distance as None
+        distance = w.get('metrics', {}).get('distance_m')
+        if distance is not None:
+            total_distance += distance
+        score_sum += w.get('total_score', 0)
+        grade_distribution[w.get('grade', 'N/A')] += 1
+    avg_score = score_sum / len(workouts)
     
-    most_common_grade = max(grade_distribution, key=grade_distribution.get) if grade_distribution else 'N/A'
+    # most_common() breaks ties by first appearance, as max() over the dict did
+    most_common_grade = grade_distribution.most_common(1)[0][0] if grade_distribution else 'N/A'
     
     return {
         'total_workouts': len(workouts),
         'total_distance': total_distance,
         'average_score': avg_score,
         'most_common_grade': most_common_grade,
-        'grade_distribution': grade_distribution,
+        'grade_distribution': dict(grade_distribution),
         'overall_trend': trends.get('score', {}).get('trend', 'stable') if 'score' in trends else 'stable'
     }
@@ -51,14 +51,29 @@ Environment Variables:
     DATABASE_URL: PostgreSQL connection string
         Format: postgresql://[user]:[password]@[host]:[port]/[database][?sslmode=require]
         SSL mode is automatically added if missing (required for Supabase)
+    DB_POOL_SIZE: Connections kept open in the pool (default: 20)
+    DB_MAX_OVERFLOW: Extra connections allowed under burst load (default: 20)
+    DB_POOL_TIMEOUT: Seconds to wait for a free connection (default: 10)
+    DB_POOL_RECYCLE: Seconds before a connection is replaced (default: 1800)
+        The pool settings apply to both the sync engine and, when asyncpg is
+        installed, the async engine used by async endpoints (get_async_db)
 """
 
-from sqlalchemy import create_engine, text
+from fastapi import HTTPException
+from sqlalchemy import create_engine, make_url, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import time
 import logging
-from typing import Generator, Tuple
+from typing import AsyncGenerator, Dict, Generator, Optional, Tuple
+
+try:
+    import asyncpg  # noqa: F401 - driver for the async engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -66,6 +81,15 @@ logger = logging.getLogger(__name__)
 # Get DATABASE_URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Connection pool sizing. Each in-flight request holds a session, so a pool
+# smaller than the request concurrency falls back to overflow connects, each
+# paying a fresh TCP + TLS handshake. Recycle before Supabase drops idle
+# connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
 # Create SQLAlchemy engine
 # If DATABASE_URL is not set, create a None engine (database features will be disabled)
 if DATABASE_URL:
@@ -77,9 +101,16 @@ if DATABASE_URL:
     
     engine = create_engine(
         DATABASE_URL,
-        pool_size=5,           # Small footprint for free tier
-        max_overflow=10,        # Maximum overflow connections
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,   # Fail fast instead of queueing for 30s
+        pool_recycle=DB_POOL_RECYCLE,   # Replace connections before the server idles them out
         pool_pre_ping=True,     # Verify connections before using them
+        connect_args={
+            "connect_timeout": 5,       # Seconds (libpq)
+            "keepalives": 1,            # TCP keepalives keep pooled connections alive
+            "keepalives_idle": 30,
+        },
         echo=False              # Set to True for SQL query logging (useful for debugging)
     )
     logger.info("Database engine created successfully")
@@ -90,6 +121,48 @@ else:
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) if engine else None
 
+
+def async_database_url(database_url: str) -> Tuple[str, Dict]:
+    """
+    Rewrite a postgresql:// URL for the asyncpg driver.
+    
+    asyncpg takes SSL as a connect argument rather than a sslmode query
+    parameter, so sslmode is moved into connect_args.
+    
+    Returns:
+        Tuple of (async URL, connect_args)
+    """
+    url = make_url(database_url)
+    sslmode = url.query.get("sslmode")
+    url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+    connect_args = {"timeout": 5}
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    return url.render_as_string(hide_password=False), connect_args
+
+
+# Async engine for async endpoints, so queries don't block the event loop.
+# The sync engine above stays for the background sync thread, migrations and
+# the existing sync store functions (run them with AsyncSession.run_sync).
+if DATABASE_URL and ASYNCPG_AVAILABLE:
+    ASYNC_DATABASE_URL, _async_connect_args = async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=_async_connect_args,
+        echo=False
+    )
+    # Keep attributes loaded after commit: lazy refreshes can't run outside
+    # the async session's own awaits
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
 # Create Base class for declarative models
 Base = declarative_base()
 
@@ -118,15 +191,56 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator:
+    """
+    Dependency function for async FastAPI endpoints to get an AsyncSession.
+    
+    Usage in FastAPI endpoints:
+        @app.get("/api/endpoint")
+        async def my_endpoint(db: AsyncSession = Depends(get_async_db)):
+            user = await db.run_sync(get_or_create_user, athlete_id)
+    """
+    if AsyncSessionLocal is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Async database not configured. Set DATABASE_URL and install asyncpg."
+        )
+    
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Health checks poll; reuse a SELECT 1 result for this many seconds
+DB_CHECK_TTL_SECONDS = 5.0
+_last_check: Tuple[float, Optional[Tuple[bool, str]]] = (0.0, None)
+
+
 def test_db_connection() -> Tuple[bool, str]:
     """
     Test database connection by executing SELECT 1.
     
+    The result is reused for DB_CHECK_TTL_SECONDS, so frequent health checks
+    don't each take a pooled connection for a round trip.
+    
     Returns:
         Tuple of (success: bool, error_message: str)
         If success is True, error_message will be empty string.
         If success is False, error_message will contain the error details.
     """
+    global _last_check
+    
+    now = time.monotonic()
+    checked_at, last_result = _last_check
+    if last_result is not None and now - checked_at < DB_CHECK_TTL_SECONDS:
+        return last_result
+    
+    result = _run_db_check()
+    _last_check = (now, result)
+    return result
+
+
+def _run_db_check() -> Tuple[bool, str]:
+    """Execute SELECT 1 against the engine (uncached test_db_connection)."""
     if engine is None:
         error_msg = "Database engine not available. DATABASE_URL not set."
         logger.warning(error_msg)
@@ -5,14 +5,14 @@ These routes are only enabled when ENV=dev to prevent abuse in production.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 import time
 from typing import Dict
 
 # Import database dependencies
 try:
-    from db import get_db
+    from db import get_async_db
     from models import User, StravaToken
     from strava_store import get_or_create_user, upsert_strava_token
     DB_AVAILABLE = True
@@ -21,6 +21,15 @@ except ImportError:
 
 router = APIRouter(prefix="/dev", tags=["dev"])
 
+ONE_DAY_SECONDS = 24 * 60 * 60
+
+# Dummy token values for the seeded test user; expires_at is added per request
+TEST_TOKEN_TEMPLATE = {
+    "access_token": "test_access",
+    "refresh_token": "test_refresh",
+    "scope": "read,activity:read_all"
+}
+
 
 def check_dev_env():
     """
@@ -33,7 +42,7 @@ def check_dev_env():
 
 
 @router.post("/seed-user")
-async def seed_test_user(db: Session = Depends(get_db)) -> Dict:
+async def seed_test_user(db: AsyncSession = Depends(get_async_db)) -> Dict:
     """
     Dev-only endpoint to create a test user and token for database testing.
     
@@ -62,21 +71,16 @@ async def seed_test_user(db: Session = Depends(get_db)) -> Dict:
     try:
         # Create or get user with strava_athlete_id=123456789
         athlete_id = 123456789
-        user = get_or_create_user(db, athlete_id)
+        # The store functions use the sync Session API; run_sync runs them on
+        # the async connection without blocking the event loop
+        user = await db.run_sync(get_or_create_user, athlete_id)
         
-        # Calculate expires_at (now + 1 day)
-        expires_at = int(time.time()) + (24 * 60 * 60)  # 1 day in seconds
-        
-        # Prepare token payload with dummy values
-        token_payload = {
-            "access_token": "test_access",
-            "refresh_token": "test_refresh",
-            "expires_at": expires_at,
-            "scope": "read,activity:read_all"
-        }
+        # Token payload with dummy values, expiring in 1 day
+        expires_at = int(time.time()) + ONE_DAY_SECONDS
+        token_payload = {**TEST_TOKEN_TEMPLATE, "expires_at": expires_at}
         
         # Upsert token
-        token = upsert_strava_token(db, user.id, token_payload)
+        token = await db.run_sync(upsert_strava_token, user.id, token_payload)
         
         return {
             "user_id": user.id,
@@ -3,28 +3,40 @@ FastAPI backend for swimming workout dashboard.
 """
 
 from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
 import numpy as np
+import httpx
+import asyncio
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import sys
-import uuid
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Add backend directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from analysis_engine import analyze_workout
-from comparison_engine import analyze_multiple_workouts
+from analysis_engine import analyze_workout, orjson_default
+from comparison_engine import analyze_csv_files
 
 # Import database dependencies
 try:
     from db import get_db, engine, Base, test_db_connection
+    from sqlalchemy import select
     DB_AVAILABLE = engine is not None
     
     # Import models to register them with Base.metadata (if models exist)
@@ -63,7 +75,12 @@ except ImportError:
     DB_AVAILABLE = False
     print("WARNING: Database module not available. Database features disabled.")
 
-app = FastAPI(title="Swimming Workout Dashboard", version="1.0.0")
+# Endpoints returning plain dicts are rendered with orjson when it's installed
+app = FastAPI(
+    title="Swimming Workout Dashboard",
+    version="1.0.0",
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -78,12 +95,10 @@ app.add_middleware(
 # Get the fastapi_dashboard directory (parent of backend)
 BACKEND_DIR = Path(__file__).parent
 BASE_DIR = BACKEND_DIR.parent
-UPLOAD_DIR = BASE_DIR / "uploads"
 STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR = BASE_DIR / "templates"
 
 # Create directories if they don't exist
-UPLOAD_DIR.mkdir(exist_ok=True)
 STATIC_DIR.mkdir(exist_ok=True)
 TEMPLATES_DIR.mkdir(exist_ok=True)
 
@@ -110,11 +125,19 @@ async def root(request: Request):
     })
 
 
+# The dashboard polls /api/config; reuse the database probes for this many seconds
+CONFIG_CACHE_TTL_SECONDS = 5.0
+_config_cache: Tuple[float, Optional[Dict]] = (0.0, None)
+
+
 @app.get("/api/config")
 async def get_config():
     """
     Get application configuration including feature flags and database status.
     
+    The result is cached for CONFIG_CACHE_TTL_SECONDS, so polling doesn't
+    run the database probes on every call.
+    
     Returns:
         {
             "strava_enabled": bool,
@@ -123,6 +146,13 @@ async def get_config():
             "debug": {...}
         }
     """
+    global _config_cache
+    
+    now = time.monotonic()
+    cached_at, cached_config = _config_cache
+    if cached_config is not None and now - cached_at < CONFIG_CACHE_TTL_SECONDS:
+        return cached_config
+    
     # Debug: Check raw env var value
     raw_value = os.getenv("STRAVA_ENABLED", "NOT_SET")
     
@@ -159,15 +189,16 @@ async def get_config():
             db = next(db_gen)
             
             try:
-                # Check if any Strava token exists
-                token_count = db.query(StravaToken).count()
-                config["strava_token_stored"] = token_count > 0
+                # Check if any Strava token exists: SELECT EXISTS stops at the
+                # first row instead of counting the whole table
+                config["strava_token_stored"] = db.query(db.query(StravaToken).exists()).scalar()
             finally:
                 db.close()
         except Exception:
             # If we can't check, assume false
             config["strava_token_stored"] = False
     
+    _config_cache = (now, config)
     return config
 
 
@@ -196,9 +227,10 @@ async def debug_strava_athlete(athlete_id: Optional[int] = None):
         )
     
     try:
-        import httpx
+        from sqlalchemy import select
+        from sqlalchemy.orm import joinedload
         from db import get_db
-        from models import User, StravaToken
+        from models import StravaToken
         from strava_store import ensure_valid_access_token
         
         if not DB_AVAILABLE:
@@ -214,7 +246,13 @@ async def debug_strava_athlete(athlete_id: Optional[int] = None):
         try:
             # If athlete_id not provided, get the most recent token
             if not athlete_id:
-                token = db.query(StravaToken).join(User).order_by(StravaToken.updated_at.desc()).first()
+                # Load the token's user in the same SELECT (inner join, as before)
+                token = db.scalars(
+                    select(StravaToken)
+                    .options(joinedload(StravaToken.user, innerjoin=True))
+                    .order_by(StravaToken.updated_at.desc())
+                    .limit(1)
+                ).first()
                 if token and token.user:
                     athlete_id = token.user.strava_athlete_id
                 else:
@@ -233,37 +271,38 @@ async def debug_strava_athlete(athlete_id: Optional[int] = None):
                 )
             
             # Call Strava API to get athlete info
-            async with httpx.AsyncClient() as client:
-                athlete_response = await client.get(
-                    "https://www.strava.com/api/v3/athlete",
-                    headers={"Authorization": f"Bearer {access_token}"},
-                    timeout=10.0
+            # Shared keep-alive client (see startup_event)
+            client = app.state.http_client
+            athlete_response = await client.get(
+                "https://www.strava.com/api/v3/athlete",
+                headers={"Authorization": f"Bearer {access_token}"},
+                timeout=10.0
+            )
+            
+            if athlete_response.status_code == 401 or athlete_response.status_code == 403:
+                error_detail = athlete_response.text
+                try:
+                    error_json = athlete_response.json()
+                    error_detail = str(error_json)
+                except:
+                    pass
+                return JSONResponse(
+                    status_code=athlete_response.status_code,
+                    content={
+                        "error": "strava_error",
+                        "details": error_detail
+                    }
                 )
-                
-                if athlete_response.status_code == 401 or athlete_response.status_code == 403:
-                    error_detail = athlete_response.text
-                    try:
-                        error_json = athlete_response.json()
-                        error_detail = str(error_json)
-                    except:
-                        pass
-                    return JSONResponse(
-                        status_code=athlete_response.status_code,
-                        content={
-                            "error": "strava_error",
-                            "details": error_detail
-                        }
-                    )
-                
-                athlete_response.raise_for_status()
-                athlete_data = athlete_response.json()
-                
-                return {
-                    "id": athlete_data.get("id"),
-                    "username": athlete_data.get("username"),
-                    "firstname": athlete_data.get("firstname"),
-                    "lastname": athlete_data.get("lastname")
-                }
+            
+            athlete_response.raise_for_status()
+            athlete_data = athlete_response.json()
+            
+            return {
+                "id": athlete_data.get("id"),
+                "username": athlete_data.get("username"),
+                "firstname": athlete_data.get("firstname"),
+                "lastname": athlete_data.get("lastname")
+            }
         finally:
             db.close()
     except ImportError as e:
@@ -324,6 +363,202 @@ else:
     print(f"INFO: Dev routes disabled (ENV={ENV}, not 'dev')")
 
 
+def _identity(obj):
+    """Leaf converter for values that are already JSON-native."""
+    return obj
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    """Leaf converter for floats: NaN isn't valid JSON, so it becomes None."""
+    return None if value != value else value
+
+
+def _numpy_float(value) -> Optional[float]:
+    """Leaf converter for NumPy floats."""
+    return _nan_to_none(float(value))
+
+
+def _na_to_none(obj):
+    """Fallback leaf converter: pandas missing values (NaT, NA) become None."""
+    try:
+        return None if pd.isna(obj) else obj
+    except (TypeError, ValueError):
+        # Array-likes (Series, Index) make pd.isna return an array, whose
+        # truth value is ambiguous
+        return obj.tolist() if hasattr(obj, 'tolist') else obj
+
+
+# Leaf converters for make_serializable, matched against the leaf type's MRO
+LEAF_CONVERTERS = {
+    type(None): _identity,
+    str: _identity,
+    bool: _identity,
+    int: _identity,
+    float: _nan_to_none,
+    np.bool_: bool,
+    np.integer: int,
+    np.floating: _numpy_float,
+    np.ndarray: np.ndarray.tolist,
+}
+
+
+@lru_cache(maxsize=None)
+def _leaf_converter(cls: type):
+    """Find the converter for a leaf type; anything unlisted goes through pd.isna."""
+    for base in cls.__mro__:
+        if base in LEAF_CONVERTERS:
+            return LEAF_CONVERTERS[base]
+    return _na_to_none
+
+
+def make_serializable(obj):
+    """
+    Convert NumPy/pandas values in nested dicts/lists to JSON-serializable Python types.
+    
+    Containers are walked with an explicit stack rather than recursion, and
+    each leaf is converted by a per-type converter looked up once per type.
+    NaN becomes None.
+    """
+    if isinstance(obj, dict):
+        result = {}
+    elif isinstance(obj, list):
+        result = []
+    else:
+        return _leaf_converter(type(obj))(obj)
+    
+    stack = [(obj, result)]
+    while stack:
+        source, target = stack.pop()
+        is_dict = isinstance(target, dict)
+        for key, value in (source.items() if is_dict else enumerate(source)):
+            if isinstance(value, dict):
+                converted = {}
+                stack.append((value, converted))
+            elif isinstance(value, list):
+                converted = []
+                stack.append((value, converted))
+            else:
+                converted = _leaf_converter(type(value))(value)
+            if is_dict:
+                target[key] = converted
+            else:
+                target.append(converted)
+    return result
+
+
+def json_response(content) -> Response:
+    """
+    Serialize an analysis payload into a JSON response.
+    
+    With orjson installed, NumPy scalars and arrays are serialized in C and
+    NaN becomes null, so the payload is never walked in Python. Otherwise
+    falls back to make_serializable + JSONResponse.
+    """
+    if ORJSON_AVAILABLE:
+        return Response(
+            content=orjson.dumps(
+                content,
+                default=orjson_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ),
+            media_type="application/json"
+        )
+    return JSONResponse(content=make_serializable(content))
+
+
+# Upload limits. Browsers label .csv files inconsistently (Excel installs
+# report application/vnd.ms-excel, some platforms send octet-stream), so only
+# clearly non-CSV content types are rejected.
+MAX_CSV_BYTES = int(os.getenv("MAX_CSV_BYTES", str(20 * 1024 * 1024)))
+CSV_CONTENT_TYPES = (
+    "text/csv",
+    "application/csv",
+    "application/vnd.ms-excel",
+    "text/plain",
+    "application/octet-stream",
+)
+
+
+# Whole-request body limits for the upload endpoints, enforced while the body
+# streams in (see UploadSizeLimitMiddleware). The slack covers the multipart
+# boundaries and part headers around the file bytes.
+MAX_COMPARE_FILES = 20
+MULTIPART_SLACK_BYTES = 64 * 1024
+UPLOAD_BODY_LIMITS = {
+    "/api/analyze": MAX_CSV_BYTES + MULTIPART_SLACK_BYTES,
+    "/api/compare": MAX_COMPARE_FILES * (MAX_CSV_BYTES + MULTIPART_SLACK_BYTES),
+}
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Fail upload requests with 413 once their body passes UPLOAD_BODY_LIMITS.
+    
+    Starlette spools the whole multipart body to disk before the endpoint
+    runs, so the limit is checked on the body as the parser pulls it: an
+    oversized Content-Length is refused before anything is received, and a
+    body without one is cut off as soon as the bytes counted so far exceed
+    the limit. The 413 is raised from inside the request, so it goes
+    through the usual exception handling (and CORS headers).
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        limit = UPLOAD_BODY_LIMITS.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        declared = int(content_length) if content_length.isdigit() else 0
+        received = 0
+        
+        def too_large() -> HTTPException:
+            return HTTPException(
+                status_code=413,
+                detail=f"Request body exceeds the {limit // (1024 * 1024)} MB upload limit"
+            )
+        
+        async def limited_receive():
+            nonlocal received
+            if declared > limit:
+                raise too_large()
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise too_large()
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
+
+def validate_csv_upload(file: UploadFile) -> None:
+    """
+    Reject an upload by content type and size.
+    
+    Runs once the body has been spooled; UploadSizeLimitMiddleware is what
+    stops an oversized request while it is still being received.
+    
+    Raises:
+        HTTPException: 415 for a non-CSV content type, 413 above MAX_CSV_BYTES
+    """
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    if content_type and content_type not in CSV_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type for {file.filename}: {file.content_type}")
+    # size is counted by the multipart parser as it spools the body
+    if file.size is not None and file.size > MAX_CSV_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{file.filename} exceeds the {MAX_CSV_BYTES // (1024 * 1024)} MB upload limit"
+        )
+
+
 @app.post("/api/analyze")
 async def analyze_workout_file(file: UploadFile = File(...)):
     """
@@ -341,60 +576,25 @@ async def analyze_workout_file(file: UploadFile = File(...)):
     if not file.filename or not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV file")
     
-    # Save uploaded file
-    file_id = str(uuid.uuid4())
-    file_path = UPLOAD_DIR / f"{file_id}.csv"
+    validate_csv_upload(file)
     
     try:
-        # Read and save file
-        contents = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(contents)
-        
-        # Load CSV
-        df = pd.read_csv(file_path)
+        # Parse straight from the upload's spooled temp file; no copy to disk
+        df = pd.read_csv(file.file)
         
         if df.empty:
             raise HTTPException(status_code=400, detail="CSV file is empty")
         
-        # Analyze workout
-        analysis = analyze_workout(df)
-        
-        # Clean up uploaded file
-        if file_path.exists():
-            os.remove(file_path)
+        # Analyze workout in a worker thread so the event loop keeps serving
+        # other requests while pandas crunches the samples
+        analysis = await asyncio.to_thread(analyze_workout, df)
         
-        # Convert to JSON-serializable format (handle any remaining NumPy types)
-        def make_serializable(obj):
-            if isinstance(obj, (np.integer, np.int64, np.int32, np.int16, np.int8)):
-                return int(obj)
-            elif isinstance(obj, (np.floating, np.float64, np.float32, np.float16)):
-                return float(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, dict):
-                return {k: make_serializable(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [make_serializable(item) for item in obj]
-            elif pd.isna(obj):
-                return None
-            return obj
-        
-        # Ensure all values are JSON serializable
-        serializable_analysis = make_serializable(analysis)
-        
-        return JSONResponse(content=serializable_analysis)
+        # Serialize (handles any remaining NumPy types)
+        return json_response(analysis)
     
     except pd.errors.EmptyDataError:
-        if file_path.exists():
-            os.remove(file_path)
         raise HTTPException(status_code=400, detail="CSV file is empty or invalid")
     except Exception as e:
-        # Clean up on error
-        if file_path.exists():
-            os.remove(file_path)
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error analyzing file: {str(e)}")
@@ -417,71 +617,27 @@ async def compare_workouts(files: List[UploadFile] = File(...)):
     if len(files) < 2:
         raise HTTPException(status_code=400, detail="Please upload at least 2 CSV files for comparison")
     
-    if len(files) > 20:
-        raise HTTPException(status_code=400, detail="Maximum 20 files allowed for comparison")
+    if len(files) > MAX_COMPARE_FILES:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_COMPARE_FILES} files allowed for comparison")
     
-    workout_dataframes = []
-    file_paths = []
+    csv_files = [file for file in files if file.filename.endswith('.csv')]
+    for file in csv_files:
+        validate_csv_upload(file)
     
     try:
-        # Process all uploaded files
-        for file in files:
-            if not file.filename.endswith('.csv'):
-                continue
-            
-            # Save uploaded file
-            file_id = str(uuid.uuid4())
-            file_path = UPLOAD_DIR / f"{file_id}.csv"
-            file_paths.append(file_path)
-            
-            # Read and save file
-            contents = await file.read()
-            with open(file_path, 'wb') as f:
-                f.write(contents)
-            
-            # Load CSV
-            df = pd.read_csv(file_path)
-            if not df.empty:
-                workout_dataframes.append(df)
-        
-        if len(workout_dataframes) < 2:
-            raise HTTPException(status_code=400, detail="Need at least 2 valid CSV files for comparison")
-        
-        # Analyze multiple workouts
-        comparison = analyze_multiple_workouts(workout_dataframes)
+        csv_contents = [await file.read() for file in csv_files]
         
-        # Clean up uploaded files
-        for file_path in file_paths:
-            if file_path.exists():
-                os.remove(file_path)
+        # Parse and analyze in a worker process (see startup_event): both are
+        # CPU-bound and would otherwise contend for this process's GIL
+        loop = asyncio.get_running_loop()
+        comparison = await loop.run_in_executor(app.state.process_pool, analyze_csv_files, csv_contents)
         
-        # Convert to JSON-serializable format
-        def make_serializable(obj):
-            if isinstance(obj, (np.integer, np.int64, np.int32, np.int16, np.int8)):
-                return int(obj)
-            elif isinstance(obj, (np.floating, np.float64, np.float32, np.float16)):
-                return float(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, dict):
-                return {k: make_serializable(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [make_serializable(item) for item in obj]
-            elif pd.isna(obj):
-                return None
-            return obj
-        
-        serializable_comparison = make_serializable(comparison)
+        if comparison is None:
+            raise HTTPException(status_code=400, detail="Need at least 2 valid CSV files for comparison")
         
-        return JSONResponse(content=serializable_comparison)
+        return json_response(comparison)
     
     except Exception as e:
-        # Clean up on error
-        for file_path in file_paths:
-            if file_path.exists():
-                os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"Error comparing workouts: {str(e)}")
 
 
@@ -651,7 +807,10 @@ async def get_activities(athlete_id: Optional[int] = None, limit: int = 10):
         
         try:
             # Find user by athlete_id
-            user = db.query(User).filter(User.strava_athlete_id == athlete_id).first()
+            # 2.0-style select() statements reuse their compiled SQL across requests
+            user = db.execute(
+                select(User).where(User.strava_athlete_id == athlete_id)
+            ).scalar_one_or_none()
             
             if not user:
                 return {
@@ -660,34 +819,34 @@ async def get_activities(athlete_id: Optional[int] = None, limit: int = 10):
                 }
             
             # Query activities sorted by start_date desc
-            activities = db.query(Activity).filter(
-                Activity.user_id == user.id
-            ).order_by(
-                Activity.start_date.desc()
-            ).limit(limit).all()
+            # Select only the listed columns; the database extracts name and
+            # start_date from raw_json, so the full blobs are never loaded
+            rows = db.execute(
+                select(
+                    Activity.id,
+                    Activity.type,
+                    Activity.start_date,
+                    Activity.distance_m,
+                    Activity.raw_json["name"].as_string(),
+                    Activity.raw_json["start_date"].as_string()
+                ).where(
+                    Activity.user_id == user.id
+                ).order_by(
+                    Activity.start_date.desc()
+                ).limit(limit)
+            ).all()
             
             # Format activities for response
-            formatted_activities = []
-            for activity in activities:
-                # Get name from raw_json if available
-                name = "Untitled"
-                if activity.raw_json and isinstance(activity.raw_json, dict):
-                    name = activity.raw_json.get("name", "Untitled")
-                
-                # Format start_date
-                start_date_str = None
-                if activity.start_date:
-                    start_date_str = activity.start_date.isoformat()
-                elif activity.raw_json and isinstance(activity.raw_json, dict):
-                    start_date_str = activity.raw_json.get("start_date")
-                
-                formatted_activities.append({
-                    "id": activity.id,
-                    "name": name,
-                    "type": activity.type or "Unknown",
-                    "start_date": start_date_str,
-                    "distance": activity.distance_m or 0
-                })
+            formatted_activities = [
+                {
+                    "id": activity_id,
+                    "name": raw_name or "Untitled",
+                    "type": activity_type or "Unknown",
+                    "start_date": start_date.isoformat() if start_date else raw_start_date,
+                    "distance": distance_m or 0
+                }
+                for activity_id, activity_type, start_date, distance_m, raw_name, raw_start_date in rows
+            ]
             
             return {
                 "count": len(formatted_activities),
@@ -707,12 +866,30 @@ async def get_activities(athlete_id: Optional[int] = None, limit: int = 10):
         )
 
 
+# Worker processes for /api/compare
+COMPARE_WORKERS = int(os.getenv("COMPARE_WORKERS", str(os.cpu_count() or 1)))
+
 # Background sync job (optional, controlled by env var)
 BACKGROUND_SYNC_ENABLED = os.getenv("BACKGROUND_SYNC_ENABLED", "false").lower() in ("true", "1", "yes", "on")
 
 @app.on_event("startup")
 async def startup_event():
-    """Start background sync job if enabled."""
+    """Create the shared HTTP client and process pool, and start background sync job if enabled."""
+    # One pooled client for outbound Strava calls, so keep-alive connections
+    # are reused instead of paying a TLS handshake per request
+    app.state.http_client = httpx.AsyncClient(
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=20)
+    )
+    # Multi-workout comparisons run here, off this process's GIL. Workers are
+    # started on demand, by which point this process has event-loop, threadpool
+    # and background-sync threads, so they are spawned rather than forked: a
+    # forked child could inherit a lock (logging, DB pool) held by one of them
+    app.state.process_pool = ProcessPoolExecutor(
+        max_workers=COMPARE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    
     if BACKGROUND_SYNC_ENABLED and STRAVA_ENABLED and DB_AVAILABLE:
         try:
             from strava_background_sync import start_background_sync
@@ -726,7 +903,10 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Stop background sync job."""
+    """Close the shared HTTP client and process pool, and stop background sync job."""
+    await app.state.http_client.aclose()
+    app.state.process_pool.shutdown(wait=False, cancel_futures=True)
+    
     if BACKGROUND_SYNC_ENABLED:
         try:
             from strava_background_sync import stop_background_sync
@@ -4,6 +4,7 @@ Strava OAuth integration for importing workouts.
 
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse, HTMLResponse
+import asyncio
 import os
 from typing import Optional
 
@@ -965,8 +966,12 @@ async def analyze_multiple_strava_activities(request: Request, athlete_id: Optio
                 detail=f"Not enough valid swimming activities found. Need at least 2, found {len(all_dataframes)}"
             )
         
-        # Analyze using comparison engine
-        comparison_result = analyze_multiple_workouts(all_dataframes)
+        # Analyze using comparison engine, in the shared worker process pool
+        # /api/compare uses (see main.startup_event)
+        loop = asyncio.get_running_loop()
+        comparison_result = await loop.run_in_executor(
+            request.app.state.process_pool, analyze_multiple_workouts, all_dataframes
+        )
         
         return comparison_result
     
@@ -11,6 +11,16 @@ from pathlib import Path
 from typing import Optional, Dict
 
 
+def metadata_path(csv_file_path: str) -> str:
+    """
+    Path of the metadata sidecar next to a converted CSV.
+    
+    Mirrors convert_fit_to_csv.metadata_path, which isn't imported so this
+    script keeps running without fitparse.
+    """
+    return os.path.splitext(csv_file_path)[0] + '.meta.json'
+
+
 def get_workout_type(csv_file_path: str) -> Optional[str]:
     """
     Determine the workout type from a CSV file.
@@ -144,6 +154,8 @@ def group_csv_files(csv_folder: str) -> Dict[str, int]:
             # Move file to appropriate folder
             dest_path = os.path.join(folders[workout_type], filename)
             shutil.move(csv_file, dest_path)
+            if os.path.exists(metadata_path(csv_file)):
+                shutil.move(metadata_path(csv_file), metadata_path(dest_path))
             stats[workout_type] += 1
             print(f"✓ {filename} -> {workout_type}/")
         elif workout_type is None: